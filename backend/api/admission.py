@@ -0,0 +1,210 @@
+"""Admission control: bounded request workers and per-route concurrency limits.
+
+Two layers keep a traffic spike from turning into an outage:
+
+* ``BoundedThreadingHTTPServer`` replaces thread-per-connection with a fixed
+  set of worker threads and a bounded queue of accepted connections. When
+  the queue is full, the connection is answered with 503 immediately.
+* ``AdmissionControl`` caps how many requests of each route class (writes,
+  admin reports, reads) run at once, so a burst of one kind cannot take every
+  worker and starve ``/health`` or customer reads.
+
+Rejected requests get the API's usual error envelope with ``Retry-After``.
+"""
+
+from __future__ import annotations
+
+import queue
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Iterator
+
+# Never limited here: probes, metrics, preflight and unknown paths ("health"), and SSE, which
+# ``changefeed.ChangeFeed`` caps itself ("stream").
+UNLIMITED_CLASSES = frozenset({"health", "stream"})
+# How long an overloaded connection may take to send its request before it is dropped.
+REJECT_READ_TIMEOUT = 1.0
+
+
+class ReleasingStream:
+    """Iterator over a streamed body that calls ``release`` exactly once when closed."""
+
+    def __init__(self, chunks: Iterator[bytes], release: Callable[[], None]) -> None:
+        self._chunks = chunks
+        self._release: Callable[[], None] | None = release
+
+    def __iter__(self) -> ReleasingStream:
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self._chunks)
+
+    def close(self) -> None:
+        # A generator that never started skips its ``finally``, so releasing cannot be left to it.
+        try:
+            close = getattr(self._chunks, "close", None)
+            if close is not None:
+                close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class AdmissionControl:
+    """Non-blocking per-class concurrency limits with rejection counters."""
+
+    def __init__(self, limits: dict[str, int]) -> None:
+        # A limit of 0, or a class missing from ``limits``, means unlimited.
+        self.limits = {name: limit for name, limit in limits.items() if limit > 0 and name not in UNLIMITED_CLASSES}
+        self._lock = threading.Lock()
+        self._active: dict[str, int] = {name: 0 for name in self.limits}
+        self._rejected: dict[tuple[str, str], int] = {}
+        self._queue_depth: Callable[[], int] | None = None
+        self._queue_capacity = 0
+
+    def try_acquire(self, route_class: str) -> Callable[[], None] | None:
+        """Take a slot for ``route_class``; returns its release callback, or ``None`` when full."""
+        limit = self.limits.get(route_class)
+        if limit is None:
+            return _noop
+        with self._lock:
+            if self._active[route_class] >= limit:
+                key = (route_class, "concurrency")
+                self._rejected[key] = self._rejected.get(key, 0) + 1
+                return None
+            self._active[route_class] += 1
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            with self._lock:
+                if not released:
+                    released = True
+                    self._active[route_class] -= 1
+
+        return release
+
+    def record_rejection(self, route_class: str, reason: str) -> None:
+        with self._lock:
+            key = (route_class, reason)
+            self._rejected[key] = self._rejected.get(key, 0) + 1
+
+    def bind_queue(self, depth: Callable[[], int], capacity: int) -> None:
+        """Report an engine's request queue in ``render_metrics``."""
+        self._queue_depth = depth
+        self._queue_capacity = capacity
+
+    def render_metrics(self) -> str:
+        """Prometheus text lines for limits, active slots, rejections and the engine queue."""
+        with self._lock:
+            active = sorted(self._active.items())
+            rejected = sorted(self._rejected.items())
+        lines = ["# TYPE hss_admission_active gauge"]
+        lines += [f'hss_admission_active{{class="{name}"}} {value}' for name, value in active]
+        lines.append("# TYPE hss_admission_limit gauge")
+        lines += [f'hss_admission_limit{{class="{name}"}} {self.limits[name]}' for name, _ in active]
+        lines.append("# TYPE hss_admission_rejected_total counter")
+        lines += [
+            f'hss_admission_rejected_total{{class="{name}",reason="{reason}"}} {value}'
+            for (name, reason), value in rejected
+        ]
+        if self._queue_depth is not None:
+            lines += [
+                "# TYPE hss_request_queue_depth gauge",
+                f"hss_request_queue_depth {self._queue_depth()}",
+                "# TYPE hss_request_queue_capacity gauge",
+                f"hss_request_queue_capacity {self._queue_capacity}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _noop() -> None:
+    pass
+
+
+class BoundedThreadingHTTPServer(HTTPServer):
+    """``HTTPServer`` that serves connections on ``workers`` threads behind a queue of ``queue_depth``.
+
+    ``overload_handler_class`` answers connections that arrive while the queue
+    is full. It runs on the accepting thread, so it should set a short
+    ``timeout`` such as ``REJECT_READ_TIMEOUT``.
+    """
+
+    # socketserver's default listen backlog of 5 overflows during a burst; the kernel then resets connections
+    # before they are accepted, so they never get a 503.
+    request_queue_size = 1024
+    # Seconds ``server_close`` waits for queued and running requests before giving up on them.
+    shutdown_grace = 10.0
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_class: type[BaseHTTPRequestHandler],
+        overload_handler_class: type[BaseHTTPRequestHandler],
+        workers: int = 32,
+        queue_depth: int = 64,
+        admission: AdmissionControl | None = None,
+        bind_and_activate: bool = True,
+    ) -> None:
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.overload_handler_class = overload_handler_class
+        self.workers = max(1, workers)
+        self.queue_depth = max(1, queue_depth)
+        self.admission = admission
+        self._pending: queue.Queue[Any] = queue.Queue(maxsize=self.queue_depth)
+        self._threads = [
+            threading.Thread(target=self._work, name=f"hss-http-{index}", daemon=True) for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        if admission is not None:
+            admission.bind_queue(self._pending.qsize, self.queue_depth)
+
+    def process_request(self, request: socket.socket, client_address: Any) -> None:  # type: ignore[override]
+        try:
+            self._pending.put_nowait((request, client_address))
+        except queue.Full:
+            try:
+                self.overload_handler_class(request, client_address, self)
+            except Exception:  # noqa: BLE001
+                pass
+            self.shutdown_request(request)
+
+    def _work(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:  # noqa: BLE001
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        """Stop accepting, let queued and running requests finish, then stop the worker threads.
+
+        Waits up to ``shutdown_grace`` seconds; connections still queued after that are closed unanswered.
+        """
+        super().server_close()
+        deadline = time.monotonic() + self.shutdown_grace
+        # Sentinels queue behind accepted connections, so every worker serves those before it exits.
+        for _ in self._threads:
+            try:
+                self._pending.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                self.shutdown_request(item[0])
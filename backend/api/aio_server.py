@@ -0,0 +1,294 @@
+"""asyncio server engine with persistent HTTP/1.1 connections.
+
+Each connection is a coroutine, so thousands of idle keep-alive connections
+cost no threads. Requests on a connection are served in order (pipelined
+requests queue in the stream reader), and the route logic runs in
+``ApiHandler`` on a bounded thread pool because SQLite calls block.
+Unbuffered streams (the SSE change feed) wait between chunks, so they are read
+on a separate pool and never take threads from route handlers.
+Status, headers and body match the threaded engine; only the protocol version
+and connection-management headers differ.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from http.client import parse_headers
+from typing import Callable, Iterator
+
+from server import ADMISSION, FEED, ApiHandler, Handler, Request, Response, coalesce_chunks
+
+MAX_REQUEST_LINE = 8192
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 10 * 1024 * 1024
+SUPPORTED_VERSIONS = {"HTTP/1.0", "HTTP/1.1"}
+SERVER_HEADER = f"{Handler.server_version} {Handler.sys_version}"
+
+
+class HttpError(Exception):
+    """A request that cannot be parsed; answered with ``status`` and the connection closed."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _status_line(status: int) -> bytes:
+    try:
+        phrase = HTTPStatus(status).phrase
+    except ValueError:
+        phrase = ""
+    return f"HTTP/1.1 {status} {phrase}\r\n".encode("latin-1")
+
+
+def _wants_keep_alive(request: Request) -> bool:
+    connection = request.headers.get("Connection", "").lower()
+    if request.http_version == "HTTP/1.1":
+        return "close" not in connection
+    return "keep-alive" in connection
+
+
+def _next_chunk(chunks: Iterator[bytes]) -> bytes | None:
+    return next(chunks, None)
+
+
+class AsyncHTTPServer:
+    def __init__(
+        self,
+        workers: int | None = None,
+        idle_timeout: float = 75.0,
+        max_body_bytes: int = MAX_BODY_BYTES,
+        app: Callable[[Request], Response] | None = None,
+        log_requests: bool = True,
+        max_pending: int = 256,
+        shed: Callable[[Request], Response] | None = None,
+        stream_workers: int = 8,
+    ) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hss-aio")
+        # One thread per open unbuffered stream; size it to the change feed's stream cap.
+        self.stream_executor = ThreadPoolExecutor(
+            max_workers=max(1, stream_workers), thread_name_prefix="hss-aio-stream"
+        )
+        self.idle_timeout = idle_timeout
+        self.max_body_bytes = max_body_bytes
+        self.app = app or (lambda request: ApiHandler(request).dispatch())
+        self.log_requests = log_requests
+        # Requests handed to the executor and not yet answered; beyond ``max_pending`` they are shed with 503.
+        self.max_pending = max(1, max_pending)
+        self.shed = shed or (lambda request: ApiHandler(request).shed())
+        self.pending = 0
+        self._connections: dict[asyncio.StreamWriter, bool] = {}  # writer -> busy
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8081, sock: socket.socket | None = None) -> None:
+        if sock is not None:
+            self._server = await asyncio.start_server(self._serve_connection, sock=sock, limit=MAX_HEADER_BYTES)
+        else:
+            self._server = await asyncio.start_server(
+                self._serve_connection, host, port, limit=MAX_HEADER_BYTES, reuse_address=True
+            )
+
+    @property
+    def sockets(self) -> tuple[socket.socket, ...]:
+        return tuple(self._server.sockets) if self._server is not None else ()
+
+    async def shutdown(self, grace: float = 10.0) -> None:
+        """Stop accepting, close idle connections and let in-flight requests finish."""
+        if self._server is not None:
+            self._server.close()
+        deadline = time.monotonic() + grace
+        while time.monotonic() < deadline:
+            # Sleep first, so connections accepted just before ``close`` start and register.
+            await asyncio.sleep(0.05)
+            if not self._connections:
+                break
+            for writer, busy in list(self._connections.items()):
+                if not busy:
+                    writer.close()
+        for writer in list(self._connections):
+            writer.close()
+        self.executor.shutdown(wait=True)
+        self.stream_executor.shutdown(wait=True)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # A new connection is busy until its first response: its client has sent, or is sending, a request.
+        # Only a connection idle between keep-alive requests may be closed by shutdown.
+        self._connections[writer] = True
+        peer = writer.get_extra_info("peername")
+        client = peer[0] if isinstance(peer, tuple) else "-"
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader, writer), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    return
+                except HttpError as exc:
+                    await self._write_plain_error(writer, exc.status, str(exc))
+                    return
+                if request is None:
+                    return
+                self._connections[writer] = True
+                keep_alive = _wants_keep_alive(request)
+                loop = asyncio.get_running_loop()
+                if self.pending >= self.max_pending:
+                    response = self.shed(request)
+                else:
+                    self.pending += 1
+                    try:
+                        response = await loop.run_in_executor(self.executor, self.app, request)
+                    finally:
+                        self.pending -= 1
+                if response.stream is not None and request.http_version != "HTTP/1.1":
+                    keep_alive = False
+                await self._write_response(writer, request, response, keep_alive)
+                if self.log_requests:
+                    self._log(client, request, response.status)
+                self._connections[writer] = False
+                if not keep_alive:
+                    return
+        except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionResetError, BrokenPipeError):
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Request | None:
+        try:
+            line = await reader.readuntil(b"\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as exc:
+            raise HttpError(414, "Request line too long") from exc
+        if len(line) > MAX_REQUEST_LINE:
+            raise HttpError(414, "Request line too long")
+        parts = line.decode("latin-1").rstrip("\r\n").split()
+        if not parts:
+            # Tolerate a stray CRLF between pipelined requests.
+            return await self._read_request(reader, writer)
+        # From the request line on the connection is busy, so shutdown waits for the rest of the request.
+        self._connections[writer] = True
+        if len(parts) != 3 or parts[2] not in SUPPORTED_VERSIONS:
+            raise HttpError(400, f"Bad request line {line!r}")
+        method, target, version = parts
+
+        header_lines: list[bytes] = []
+        size = 0
+        while True:
+            try:
+                header_line = await reader.readuntil(b"\r\n")
+            except asyncio.LimitOverrunError as exc:
+                raise HttpError(431, "Request header fields too large") from exc
+            size += len(header_line)
+            if size > MAX_HEADER_BYTES:
+                raise HttpError(431, "Request header fields too large")
+            header_lines.append(header_line)
+            if header_line == b"\r\n":
+                break
+        headers = parse_headers(io.BytesIO(b"".join(header_lines)))
+
+        if "chunked" in headers.get("Transfer-Encoding", "").lower():
+            raise HttpError(411, "Chunked request bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get("Content-Length", "0") or 0)
+        except ValueError as exc:
+            raise HttpError(400, "Invalid Content-Length") from exc
+        if length < 0:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > self.max_body_bytes:
+            raise HttpError(413, "Request body too large")
+        if length and headers.get("Expect", "").lower() == "100-continue" and version == "HTTP/1.1":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        body = await reader.readexactly(length) if length else b""
+        return Request(method, target, headers, body, version)
+
+    def _head(self, response: Response, extra: list[tuple[str, str]]) -> bytes:
+        lines = [_status_line(response.status)]
+        headers = [("Server", SERVER_HEADER), ("Date", formatdate(usegmt=True)), *response.headers, *extra]
+        lines.extend(f"{name}: {value}\r\n".encode("latin-1") for name, value in headers)
+        lines.append(b"\r\n")
+        return b"".join(lines)
+
+    async def _write_response(
+        self, writer: asyncio.StreamWriter, request: Request, response: Response, keep_alive: bool
+    ) -> None:
+        connection = [("Connection", "keep-alive" if keep_alive else "close")]
+        if response.stream is None:
+            writer.write(self._head(response, connection) + response.body)
+            await writer.drain()
+            return
+
+        # Streams always use chunked framing on HTTP/1.1 so the connection can be reused afterwards.
+        chunked = request.http_version == "HTTP/1.1"
+        framing = [("Transfer-Encoding", "chunked")] if chunked else []
+        writer.write(self._head(response, framing + connection))
+        loop = asyncio.get_running_loop()
+        chunks = coalesce_chunks(response.stream) if response.buffered else iter(response.stream)
+        executor = self.executor if response.buffered else self.stream_executor
+        try:
+            while True:
+                data = await loop.run_in_executor(executor, _next_chunk, chunks)
+                if data is None:
+                    break
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data) if chunked else data)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        finally:
+            close = getattr(response.stream, "close", None)
+            if close is not None:
+                await loop.run_in_executor(executor, close)
+
+    async def _write_plain_error(self, writer: asyncio.StreamWriter, status: int, message: str) -> None:
+        body = message.encode("utf-8")
+        response = Response(status, [("Content-Type", "text/plain; charset=utf-8"), ("Content-Length", str(len(body)))])
+        writer.write(self._head(response, [("Connection", "close")]) + body)
+        try:
+            await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+
+    @staticmethod
+    def _log(client: str, request: Request, status: int) -> None:
+        timestamp = time.strftime("%d/%b/%Y %H:%M:%S")
+        sys.stderr.write(f'{client} - - [{timestamp}] "{request.method} {request.target} {request.http_version}" {status} -\n')
+
+
+async def serve(port: int = 8081, sock: socket.socket | None = None) -> None:
+    workers = int(os.getenv("HSS_AIO_WORKERS", "0")) or None
+    server = AsyncHTTPServer(
+        workers=workers,
+        idle_timeout=float(os.getenv("HSS_KEEPALIVE_TIMEOUT", "75")),
+        max_pending=int(os.getenv("HSS_AIO_MAX_PENDING", "256")),
+        stream_workers=FEED.max_streams,
+    )
+    ADMISSION.bind_queue(lambda: server.pending, server.max_pending)
+    await server.start(port=port, sock=sock)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    print(f"HSS backend API (asyncio) listening on http://0.0.0.0:{port}")
+    try:
+        await stop.wait()
+    finally:
+        # End change-feed streams now; otherwise each one holds its connection for the whole grace period.
+        FEED.close()
+        await server.shutdown()
@@ -0,0 +1,785 @@
+#!/usr/bin/env python3
+"""Load and benchmark harness for the booking API.
+
+``run`` seeds a temporary SQLite database, starts ``server.py`` against it in a
+subprocess and drives a mixed workload from concurrent client threads:
+
+* ``lifecycle``: customer login, a pickup availability lookup,
+  ``POST /api/v1/bookings`` into an open slot, staff approval, payment, then
+  the ``collected`` and ``in_storage`` status changes;
+* ``staff_queue``, ``overview`` and ``audit``: the staff and admin polling reads.
+
+It reports throughput and p50/p95/p99 latency per route, can save the results
+as JSON, and compares them against a saved baseline. It never talks to AWS:
+the server publishes through ``NoopPublisher`` or ``FakeSNSClient``.
+
+    python3 bench.py run --bookings 100000 --clients 16 --duration 30 --output results.json
+    python3 bench.py run --baseline results.json --threshold 10
+    python3 bench.py seed /tmp/hss-1m.db --bookings 1000000   # seed once, then: run --db /tmp/hss-1m.db
+
+``lambda`` feeds synthetic API Gateway proxy events to ``lambda_handler`` in
+fresh interpreters and reports cold-start import time, the first invocation
+and warm invocation latency per route:
+
+    python3 bench.py lambda --cold 10 --invocations 200 --output lambda.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import booking_stats
+import ids
+import pickup_slots
+from migrations import apply_migrations
+
+API_DIR = Path(__file__).resolve().parent
+SCENARIOS = ("lifecycle", "staff_queue", "overview", "audit")
+DEFAULT_MIX = "lifecycle=2,staff_queue=3,overview=1,audit=1"
+ITEM_TYPES = ("bed", "fridge", "box", "suitcase", "other")
+ITEM_PRICES = {"bed": 180.0, "fridge": 150.0, "box": 45.0, "suitcase": 60.0, "other": 90.0}
+HANDLING_FEE = 350.0
+# Seeded bookings end in one of these states, walking the full lifecycle up to it.
+LIFECYCLE = ("submitted", "approved", "paid", "collected", "in_storage", "returned")
+SEED_STATUS_WEIGHTS = (10, 10, 15, 15, 35, 15)
+SEED_BATCH = 5000
+COMPARED_METRICS = ("p95_ms", "throughput_rps")
+# Runs in a fresh interpreter per cold start, so nothing is imported before ``lambda_handler`` is timed.
+LAMBDA_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import lambda_handler
+imported = time.perf_counter()
+timings = []
+for route, event in json.load(sys.stdin):
+    began = time.perf_counter()
+    result = lambda_handler.handler(event, None)
+    timings.append((route, result["statusCode"], (time.perf_counter() - began) * 1000))
+print(json.dumps({"import_ms": (imported - started) * 1000, "timings": timings}))
+"""
+
+
+def _pricing(rng: random.Random, item_types: list[str]) -> dict[str, Any]:
+    duration = rng.randint(1, 12)
+    monthly = sum(ITEM_PRICES[item] for item in item_types)
+    return {
+        "duration": duration,
+        "monthlySubtotal": monthly,
+        "handlingFee": HANDLING_FEE,
+        "total": round(monthly * duration + HANDLING_FEE, 2),
+    }
+
+
+def _seed_rows(
+    rng: random.Random, generator: ids.IdGenerator, now: datetime, days: int
+) -> tuple[tuple[Any, ...], list[tuple[Any, ...]], list[tuple[Any, ...]]]:
+    """One seeded booking: its ``bookings`` row, item rows and audit history."""
+    booking_id = generator.new("HSS")
+    item_types = [rng.choice(ITEM_TYPES) for _ in range(rng.randint(1, 4))]
+    pricing = _pricing(rng, item_types)
+    created = now - timedelta(seconds=rng.randint(3600 * 6, days * 86400))
+    email = f"customer{rng.randint(1, 50000)}@example.com"
+    stage = rng.choices(range(len(LIFECYCLE)), SEED_STATUS_WEIGHTS)[0]
+
+    at = created
+    audit = [("booking_submitted", booking_id, json.dumps({"email": email, "items": len(item_types)}), at.isoformat())]
+    payment_reference = None
+    for previous, status in zip(LIFECYCLE, LIFECYCLE[1 : stage + 1]):
+        at += timedelta(hours=1)
+        if status == "approved":
+            payload = {"status": "approved", "actor_role": "staff"}
+            audit.append(("staff_booking_approved", booking_id, json.dumps(payload), at.isoformat()))
+        elif status == "paid":
+            payment_reference = generator.new("PAY")
+            payload = {"method": "card", "payment_reference": payment_reference}
+            audit.append(("payment_captured", booking_id, json.dumps(payload), at.isoformat()))
+        else:
+            audit.append(("status_updated", booking_id, json.dumps({"from": previous, "to": status}), at.isoformat()))
+
+    pickup = (created + timedelta(days=rng.randint(1, 14))).date().isoformat()
+    booking = (
+        booking_id,
+        f"Customer {rng.randint(1, 50000)}",
+        email,
+        pickup,
+        rng.choice(pickup_slots.PICKUP_WINDOWS),
+        f"{rng.randint(1, 999)} Main Road",
+        pricing["duration"],
+        len(item_types),
+        pricing["monthlySubtotal"],
+        pricing["handlingFee"],
+        pricing["total"],
+        LIFECYCLE[stage],
+        created.isoformat(),
+        at.isoformat(),
+        payment_reference,
+    )
+    items = [(booking_id, item, f"{item} {index}", "") for index, item in enumerate(item_types, start=1)]
+    return booking, items, audit
+
+
+def seed_database(path: Path, bookings: int, seed: int = 0, days: int = 365) -> None:
+    """Create a migrated database at ``path`` with ``bookings`` bookings, their items and audit history."""
+    rng = random.Random(seed)
+    generator = ids.IdGenerator(host_id=seed)
+    now = datetime.now(timezone.utc)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        apply_migrations(conn)
+        conn.execute("PRAGMA synchronous = OFF")
+        remaining = bookings
+        while remaining > 0:
+            rows = [_seed_rows(rng, generator, now, days) for _ in range(min(SEED_BATCH, remaining))]
+            remaining -= len(rows)
+            with conn:
+                conn.executemany(
+                    "INSERT INTO bookings (id, customer_name, email, pickup_date, pickup_window, address, "
+                    "duration_months, item_count, monthly_subtotal, handling_fee, total, status, created_at, "
+                    "updated_at, payment_reference) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [booking for booking, _, _ in rows],
+                )
+                conn.executemany(
+                    "INSERT INTO booking_items (booking_id, item_type, item_name, s3_key) VALUES (?, ?, ?, ?)",
+                    [item for _, items, _ in rows for item in items],
+                )
+                conn.executemany(
+                    "INSERT INTO audit_events (event_type, booking_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                    [event for _, _, audit in rows for event in audit],
+                )
+        with conn:
+            booking_stats.rebuild(conn)
+            pickup_slots.rebuild(conn)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+
+class Recorder:
+    """Per-route latency samples and status counts; each client thread has its own."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+        self.statuses: dict[str, Counter[str]] = {}
+        self.enabled = False
+
+    def record(self, route: str, status: int, elapsed_ms: float) -> None:
+        if not self.enabled:
+            return
+        self.samples.setdefault(route, []).append(elapsed_ms)
+        self.statuses.setdefault(route, Counter())[str(status)] += 1
+
+
+class Client:
+    """One simulated user session over a keep-alive connection (reopened when the server closes it)."""
+
+    def __init__(self, port: int, rng: random.Random, recorder: Recorder, timeout: float = 30.0) -> None:
+        self.port = port
+        self.rng = rng
+        self.recorder = recorder
+        self.timeout = timeout
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def call(
+        self, method: str, route: str, path: str, role: str, body: dict[str, Any] | None = None
+    ) -> tuple[int, dict[str, Any]]:
+        """Send one request and record its latency under ``route``; status ``0`` means a connection error."""
+        headers = {"X-HSS-Role": role}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=data, headers=headers)
+            response = self.conn.getresponse()
+            raw = response.read()
+            status = response.status
+            if (response.getheader("Connection") or "").lower() == "close":
+                self.conn.close()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=self.timeout)
+            self.recorder.record(route, 0, (time.perf_counter() - started) * 1000)
+            return 0, {}
+        self.recorder.record(route, status, (time.perf_counter() - started) * 1000)
+        try:
+            payload = json.loads(raw) if raw else {}
+        except ValueError:
+            payload = {}
+        return status, payload if isinstance(payload, dict) else {}
+
+    def login(self, role: str) -> bool:
+        email = f"{role}{self.rng.randint(1, 999)}@example.com"
+        body = {"email": email, "role": role}
+        status, _ = self.call("POST", "POST /api/v1/auth/login", "/api/v1/auth/login", role, body)
+        return status == 200
+
+    def lifecycle(self) -> None:
+        if not self.login("customer"):
+            return
+        # Like the booking form: look up the next fortnight's availability and pick an open slot.
+        status, availability = self.call("GET", "GET /api/v1/pickup-slots", "/api/v1/pickup-slots", "customer")
+        open_slots = [slot for slot in availability.get("slots", []) if slot["available"] > 0]
+        if status != 200 or not open_slots:
+            return
+        slot = self.rng.choice(open_slots)
+        item_types = [self.rng.choice(ITEM_TYPES) for _ in range(self.rng.randint(1, 4))]
+        booking = {
+            "customer_name": f"Bench Customer {self.rng.randint(1, 50000)}",
+            "email": f"bench{self.rng.randint(1, 50000)}@example.com",
+            "pickup_date": slot["pickup_date"],
+            "pickup_window": slot["pickup_window"],
+            "address": f"{self.rng.randint(1, 999)} Bench Street",
+            "items": [{"type": item, "name": f"{item} {index}"} for index, item in enumerate(item_types, start=1)],
+            "pricing": _pricing(self.rng, item_types),
+        }
+        status, created = self.call("POST", "POST /api/v1/bookings", "/api/v1/bookings", "customer", booking)
+        booking_id = created.get("booking_id")
+        if status != 201 or not booking_id:
+            return
+        if not self.login("staff"):
+            return
+        steps: list[tuple[str, str, str, str, dict[str, Any]]] = [
+            (
+                "POST",
+                "POST /api/v1/staff/bookings/{booking_id}/approve",
+                f"/api/v1/staff/bookings/{booking_id}/approve",
+                "staff",
+                {},
+            ),
+            (
+                "POST",
+                "POST /api/v1/bookings/{booking_id}/payment",
+                f"/api/v1/bookings/{booking_id}/payment",
+                "customer",
+                {"method": "card"},
+            ),
+        ]
+        for next_status in ("collected", "in_storage"):
+            steps.append(
+                (
+                    "PATCH",
+                    "PATCH /api/v1/bookings/{booking_id}/status",
+                    f"/api/v1/bookings/{booking_id}/status",
+                    "staff",
+                    {"status": next_status},
+                )
+            )
+        for method, route, path, role, body in steps:
+            status, _ = self.call(method, route, path, role, body)
+            if status != 200:
+                return
+
+    def staff_queue(self) -> None:
+        self.call("GET", "GET /api/v1/staff/queue", "/api/v1/staff/queue", "staff")
+
+    def overview(self) -> None:
+        self.call("GET", "GET /api/v1/admin/overview", "/api/v1/admin/overview", "admin")
+
+    def audit(self) -> None:
+        self.call("GET", "GET /api/v1/audit", "/api/v1/audit?limit=50", "staff")
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    """Parse ``name=weight,...`` into scenario weights."""
+    mix: dict[str, int] = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario {name!r}; expected one of {SCENARIOS}")
+        try:
+            mix[name] = int(weight or "1")
+        except ValueError as exc:
+            raise ValueError(f"weight for {name} must be an integer") from exc
+        if mix[name] < 0:
+            raise ValueError(f"weight for {name} must be >= 0")
+    if not any(mix.values()):
+        raise ValueError("at least one scenario needs a positive weight")
+    return mix
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples: list[float], statuses: Counter[str], seconds: float) -> dict[str, Any]:
+    ordered = sorted(samples)
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "throughput_rps": round(len(ordered) / seconds, 2) if seconds > 0 else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def run_workload(
+    port: int, clients: int, duration: float, warmup: float, mix: dict[str, int], seed: int
+) -> tuple[dict[str, dict[str, Any]], float]:
+    """Drive ``clients`` threads for ``warmup + duration`` seconds.
+
+    Returns the per-route summaries and the measured time.
+    """
+    recorders = [Recorder() for _ in range(clients)]
+    names = [name for name in SCENARIOS if mix.get(name)]
+    weights = [mix[name] for name in names]
+    start = time.monotonic()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    def drive(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        client = Client(port, rng, recorders[index])
+        scenarios: dict[str, Callable[[], None]] = {name: getattr(client, name) for name in names}
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    return
+                recorders[index].enabled = now >= measure_from
+                scenarios[rng.choices(names, weights)[0]]()
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=drive, args=(index,), name=f"bench-client-{index}") for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Scenarios started before the deadline finish after it; count the time they actually took.
+    measured = time.monotonic() - measure_from
+
+    samples: dict[str, list[float]] = {}
+    statuses: dict[str, Counter[str]] = {}
+    for recorder in recorders:
+        for route, values in recorder.samples.items():
+            samples.setdefault(route, []).extend(values)
+            statuses.setdefault(route, Counter()).update(recorder.statuses[route])
+    routes = {route: summarize(samples[route], statuses[route], measured) for route in sorted(samples)}
+    if samples:
+        everything = [value for values in samples.values() for value in values]
+        routes["total"] = summarize(everything, sum(statuses.values(), Counter()), measured)
+    return routes, measured
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(
+    db_path: Path, log_path: Path, engine: str, workers: int, publisher: str, env: dict[str, str]
+) -> tuple[subprocess.Popen[bytes], int]:
+    """Start ``server.py`` against ``db_path`` and wait until ``/health`` answers."""
+    port = _free_port()
+    server_env = {
+        **os.environ,
+        "HSS_DB_PATH": str(db_path),
+        "MESSAGE_BUS_MODE": "fake" if publisher == "fake" else "disabled",
+        **env,
+    }
+    with log_path.open("wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "server.py", "--port", str(port), "--engine", engine, "--workers", str(workers)],
+            cwd=API_DIR,
+            env=server_env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process, port
+            conn.close()
+        except OSError:
+            pass
+        time.sleep(0.1)
+    stop_server(process)
+    log_tail = log_path.read_text(errors="replace")[-2000:]
+    raise RuntimeError(f"server did not become healthy; see {log_path}:\n{log_tail}")
+
+
+def stop_server(process: subprocess.Popen[bytes]) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _environment() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git_commit": commit or None,
+    }
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any], threshold_pct: float) -> list[str]:
+    """Print a per-route comparison and return the regressions beyond ``threshold_pct``.
+
+    A route regresses when its p95 latency rises, or its throughput falls, by
+    more than the threshold. Routes missing from either run are reported but
+    not counted as regressions.
+    """
+    if result.get("config", {}).get("workload") != baseline.get("config", {}).get("workload"):
+        print("warning: workload settings differ from the baseline; the comparison may not be meaningful")
+    regressions = []
+    print(f"{'route':52} {'metric':15} {'baseline':>10} {'current':>10} {'change':>8}")
+    for route in sorted(set(result["routes"]) | set(baseline["routes"])):
+        current, before = result["routes"].get(route), baseline["routes"].get(route)
+        if current is None or before is None:
+            print(f"{route:52} {'missing in ' + ('current' if current is None else 'baseline')}")
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = before[metric], current[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            worse = change > threshold_pct if metric.endswith("_ms") else change < -threshold_pct
+            flag = "  REGRESSION" if worse else ""
+            print(f"{route:52} {metric:15} {old:>10.2f} {new:>10.2f} {change:>+7.1f}%{flag}")
+            if worse:
+                regressions.append(f"{route} {metric} {old} -> {new} ({change:+.1f}%)")
+    return regressions
+
+
+def print_results(result: dict[str, Any]) -> None:
+    print(f"{'route':52} {'count':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route, stats in result["routes"].items():
+        print(
+            f"{route:52} {stats['count']:>7} {stats['errors']:>6} {stats['throughput_rps']:>8.1f} "
+            f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+
+def proxy_event(method: str, path: str, role: str, body: dict[str, Any] | None = None) -> dict[str, Any]:
+    """A REST API (payload format 1.0) proxy event like the ones API Gateway sends ``lambda_handler``."""
+    route, _, query = path.partition("?")
+    params = dict(part.split("=", 1) for part in query.split("&")) if query else None
+    headers = {"X-HSS-Role": role, "Accept-Encoding": "gzip", "User-Agent": "hss-bench"}
+    if body is not None:
+        headers["Content-Type"] = "application/json"
+    return {
+        "resource": "/{proxy+}",
+        "path": route,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {name: [value] for name, value in headers.items()},
+        "queryStringParameters": params,
+        "multiValueQueryStringParameters": {name: [value] for name, value in params.items()} if params else None,
+        "pathParameters": {"proxy": route.lstrip("/")},
+        "requestContext": {"stage": "prod", "httpMethod": method, "path": f"/prod{route}"},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def lambda_events(rng: random.Random, invocations: int) -> list[tuple[str, dict[str, Any]]]:
+    """``invocations`` staff/admin events (plus one booking write in five), in a seeded order.
+
+    Every container starts with the staff queue, so first invocations are comparable across runs.
+    """
+    pickup = (datetime.now(timezone.utc) + timedelta(days=3)).date().isoformat()
+    reads = [
+        ("GET /api/v1/staff/queue", proxy_event("GET", "/api/v1/staff/queue", "staff")),
+        ("GET /api/v1/admin/overview", proxy_event("GET", "/api/v1/admin/overview", "admin")),
+        ("GET /api/v1/admin/bookings", proxy_event("GET", "/api/v1/admin/bookings?limit=50", "admin")),
+        ("GET /api/v1/audit", proxy_event("GET", "/api/v1/audit?limit=50", "staff")),
+    ]
+    events = [reads[0]]
+    for _ in range(invocations - 1):
+        if rng.random() < 0.2:
+            item_types = [rng.choice(ITEM_TYPES) for _ in range(rng.randint(1, 4))]
+            booking = {
+                "customer_name": f"Lambda Customer {rng.randint(1, 50000)}",
+                "email": f"lambda{rng.randint(1, 50000)}@example.com",
+                "pickup_date": pickup,
+                "pickup_window": rng.choice(pickup_slots.PICKUP_WINDOWS),
+                "address": f"{rng.randint(1, 999)} Lambda Street",
+                "items": [{"type": item, "name": f"{item} {index}"} for index, item in enumerate(item_types, start=1)],
+                "pricing": _pricing(rng, item_types),
+            }
+            events.append(("POST /api/v1/bookings", proxy_event("POST", "/api/v1/bookings", "customer", booking)))
+        else:
+            events.append(rng.choice(reads))
+    return events
+
+
+def run_lambda(
+    db_path: Path, cold: int, invocations: int, publisher: str, env: dict[str, str], seed: int
+) -> tuple[dict[str, dict[str, Any]], float]:
+    """Run ``cold`` fresh containers of ``invocations`` events each; returns per-route summaries and the time taken.
+
+    The first invocation of each container is reported on its own: it runs the
+    migrations check and starts the writer. The rest are warm.
+    """
+    probe_env = {
+        **os.environ,
+        "HSS_DB_PATH": str(db_path),
+        "MESSAGE_BUS_MODE": "fake" if publisher == "fake" else "disabled",
+        # The benchmark books the same few slots over and over.
+        "HSS_SLOT_CAPACITY": "1000000",
+        **env,
+    }
+    samples: dict[str, list[float]] = {}
+    statuses: dict[str, Counter[str]] = {}
+
+    def record(route: str, status: int, elapsed_ms: float) -> None:
+        samples.setdefault(route, []).append(elapsed_ms)
+        statuses.setdefault(route, Counter())[str(status)] += 1
+
+    started = time.monotonic()
+    for index in range(cold):
+        events = lambda_events(random.Random(seed * 1000 + index), invocations)
+        completed = subprocess.run(
+            [sys.executable, "-c", LAMBDA_PROBE],
+            cwd=API_DIR,
+            env=probe_env,
+            input=json.dumps(events).encode("utf-8"),
+            capture_output=True,
+            timeout=300,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"lambda probe failed:\n{completed.stderr.decode(errors='replace')[-2000:]}")
+        probe = json.loads(completed.stdout.decode("utf-8").strip().splitlines()[-1])
+        timings = probe["timings"]
+        record("cold: import lambda_handler", timings[0][1], probe["import_ms"])
+        record(f"cold: first invocation ({timings[0][0]})", timings[0][1], timings[0][2])
+        for route, status, elapsed_ms in timings[1:]:
+            record(route, status, elapsed_ms)
+    measured = time.monotonic() - started
+
+    routes = {route: summarize(samples[route], statuses[route], measured) for route in sorted(samples)}
+    warm = [value for route, values in samples.items() if not route.startswith("cold:") for value in values]
+    if warm:
+        warm_statuses = sum((counts for route, counts in statuses.items() if not route.startswith("cold:")), Counter())
+        routes["warm total"] = summarize(warm, warm_statuses, measured)
+    return routes, measured
+
+
+def command_lambda(args: argparse.Namespace) -> int:
+    try:
+        env = _parse_env(args.env)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    workdir = Path(tempfile.mkdtemp(prefix="hss-bench-"))
+    db_path = workdir / "bench.db"
+    try:
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+            print(f"[bench] copied {args.db}")
+        else:
+            started = time.monotonic()
+            seed_database(db_path, args.bookings, args.seed)
+            print(f"[bench] seeded {args.bookings} bookings in {time.monotonic() - started:.1f}s")
+        print(f"[bench] {args.cold} cold starts x {args.invocations} invocations")
+        routes, measured = run_lambda(db_path, args.cold, args.invocations, args.publisher, env, args.seed)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "dataset": {"bookings": None if args.db else args.bookings, "db": args.db, "seed": args.seed},
+            "workload": {
+                "lambda": True,
+                "cold": args.cold,
+                "invocations": args.invocations,
+                "publisher": args.publisher,
+                "env": env,
+            },
+        },
+        "environment": _environment(),
+        "measured_seconds": round(measured, 3),
+        "routes": routes,
+    }
+    print_results(result)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+        print(f"[bench] wrote {args.output}")
+    if args.baseline:
+        return _check_baseline(result, args.baseline, args.threshold)
+    return 0
+
+
+def _parse_env(pairs: list[str]) -> dict[str, str]:
+    env = {}
+    for pair in pairs:
+        name, sep, value = pair.partition("=")
+        if not sep or not name:
+            raise ValueError(f"--env expects NAME=VALUE, got {pair!r}")
+        env[name] = value
+    return env
+
+
+def command_run(args: argparse.Namespace) -> int:
+    try:
+        mix = parse_mix(args.mix)
+        env = _parse_env(args.env)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    workdir = Path(tempfile.mkdtemp(prefix="hss-bench-"))
+    db_path = workdir / "bench.db"
+    try:
+        if args.db:
+            # Runs write to the database, so each one starts from a fresh copy of the seeded file.
+            shutil.copyfile(args.db, db_path)
+            print(f"[bench] copied {args.db}")
+        else:
+            started = time.monotonic()
+            seed_database(db_path, args.bookings, args.seed)
+            print(f"[bench] seeded {args.bookings} bookings in {time.monotonic() - started:.1f}s")
+        process, port = start_server(db_path, workdir / "server.log", args.engine, args.workers, args.publisher, env)
+        try:
+            print(f"[bench] {args.clients} clients for {args.duration}s (+{args.warmup}s warm-up), mix {args.mix}")
+            routes, measured = run_workload(port, args.clients, args.duration, args.warmup, mix, args.seed)
+        finally:
+            stop_server(process)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "dataset": {"bookings": None if args.db else args.bookings, "db": args.db, "seed": args.seed},
+            "workload": {
+                "clients": args.clients,
+                "duration": args.duration,
+                "warmup": args.warmup,
+                "mix": mix,
+                "engine": args.engine,
+                "workers": args.workers,
+                "publisher": args.publisher,
+                "env": env,
+            },
+        },
+        "environment": _environment(),
+        "measured_seconds": round(measured, 3),
+        "routes": routes,
+    }
+    print_results(result)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+        print(f"[bench] wrote {args.output}")
+    if args.baseline:
+        return _check_baseline(result, args.baseline, args.threshold)
+    return 0
+
+
+def _check_baseline(result: dict[str, Any], baseline_path: str, threshold: float) -> int:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    regressions = compare(result, baseline, threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {threshold}%:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"no regressions beyond {threshold}%")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the HSS booking API against a seeded temporary database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="write a seeded database file for reuse with run --db")
+    seed.add_argument("path", type=Path)
+    seed.add_argument("--bookings", type=int, default=10000)
+    seed.add_argument("--seed", type=int, default=0, help="random seed for the generated data")
+
+    run = commands.add_parser("run", help="seed, start the server, drive the workload and report")
+    run.add_argument("--bookings", type=int, default=10000, help="bookings to seed (ignored with --db)")
+    run.add_argument("--db", help="copy this seeded database instead of seeding a new one")
+    run.add_argument("--seed", type=int, default=0, help="random seed for the data and the clients")
+    run.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    run.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    run.add_argument("--warmup", type=float, default=3.0, help="seconds of load before measuring")
+    run.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights, e.g. {DEFAULT_MIX}")
+    run.add_argument("--engine", choices=("threaded", "asyncio"), default="threaded")
+    run.add_argument("--workers", type=int, default=1, help="server worker processes (0 = one per CPU)")
+    run.add_argument("--publisher", choices=("noop", "fake"), default="noop", help="fake uses FakeSNSClient")
+    run.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="extra server environment")
+    run.add_argument("--output", help="write the results as JSON")
+    run.add_argument("--baseline", help="compare against a results JSON file; exit 1 on regression")
+    run.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+
+    lam = commands.add_parser("lambda", help="time lambda_handler cold starts and warm invocations in-process")
+    lam.add_argument("--bookings", type=int, default=10000, help="bookings to seed (ignored with --db)")
+    lam.add_argument("--db", help="copy this seeded database instead of seeding a new one")
+    lam.add_argument("--seed", type=int, default=0, help="random seed for the data and the events")
+    lam.add_argument("--cold", type=int, default=5, help="fresh interpreters, i.e. cold starts")
+    lam.add_argument("--invocations", type=int, default=200, help="events per cold start")
+    lam.add_argument("--publisher", choices=("noop", "fake"), default="noop", help="fake uses FakeSNSClient")
+    lam.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="extra function environment")
+    lam.add_argument("--output", help="write the results as JSON")
+    lam.add_argument("--baseline", help="compare against a results JSON file; exit 1 on regression")
+    lam.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+
+    check = commands.add_parser("compare", help="compare two saved results files")
+    check.add_argument("result")
+    check.add_argument("--baseline", required=True)
+    check.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+
+    args = parser.parse_args(argv)
+    if args.command == "seed":
+        if args.path.exists():
+            print(f"error: {args.path} already exists", file=sys.stderr)
+            return 2
+        started = time.monotonic()
+        seed_database(args.path, args.bookings, args.seed)
+        print(f"seeded {args.bookings} bookings into {args.path} in {time.monotonic() - started:.1f}s")
+        return 0
+    if args.command == "compare":
+        result = json.loads(Path(args.result).read_text(encoding="utf-8"))
+        return _check_baseline(result, args.baseline, args.threshold)
+    if args.command == "lambda":
+        return command_lambda(args)
+    return command_run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Incrementally maintained booking aggregates for the admin overview.
+
+``booking_stats`` holds one row per status (count and gross value) and
+``booking_daily_stats`` one row per UTC day (bookings created, payments
+captured). Write paths update both in the same transaction as the booking
+change, so the overview endpoint reads a handful of rows instead of scanning
+``bookings``.
+
+Run ``python3 booking_stats.py verify`` to compare the summary against a full
+recomputation, or ``python3 booking_stats.py rebuild`` to recompute it from scratch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any
+
+# Payments are captured by POST .../payment, or by a direct status change to "paid".
+PAID_EVENTS_SQL = (
+    "SELECT a.booking_id, a.created_at FROM audit_events a "
+    "WHERE a.event_type = 'payment_captured' "
+    "OR (a.event_type = 'status_updated' AND json_extract(a.payload, '$.to') = 'paid')"
+)
+
+
+def _day(timestamp: str) -> str:
+    return timestamp[:10]
+
+
+def _bump_status(conn: sqlite3.Connection, status: str, count: int, value: float) -> None:
+    conn.execute(
+        "INSERT INTO booking_stats (status, booking_count, gross_value) VALUES (?, ?, ?) "
+        "ON CONFLICT (status) DO UPDATE SET booking_count = booking_count + excluded.booking_count, "
+        "gross_value = gross_value + excluded.gross_value",
+        (status, count, value),
+    )
+
+
+def _bump_day(conn: sqlite3.Connection, day: str, created: int, created_value: float, paid: int, paid_value: float) -> None:
+    conn.execute(
+        "INSERT INTO booking_daily_stats (day, created_count, created_value, paid_count, paid_revenue) "
+        "VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (day) DO UPDATE SET created_count = created_count + excluded.created_count, "
+        "created_value = created_value + excluded.created_value, "
+        "paid_count = paid_count + excluded.paid_count, paid_revenue = paid_revenue + excluded.paid_revenue",
+        (day, created, created_value, paid, paid_value),
+    )
+
+
+def record_created_many(conn: sqlite3.Connection, bookings: list[tuple[str, float, str]]) -> None:
+    """Apply ``(status, total, created_at)`` for each new booking, one upsert per status and per day."""
+    by_status: dict[str, list[float]] = {}
+    by_day: dict[str, list[float]] = {}
+    for status, total, created_at in bookings:
+        status_entry = by_status.setdefault(status, [0, 0.0])
+        status_entry[0] += 1
+        status_entry[1] += total
+        day_entry = by_day.setdefault(_day(created_at), [0, 0.0])
+        day_entry[0] += 1
+        day_entry[1] += total
+    for status, (count, value) in by_status.items():
+        _bump_status(conn, status, int(count), value)
+    for day, (count, value) in by_day.items():
+        _bump_day(conn, day, int(count), value, 0, 0.0)
+
+
+def record_status_change(
+    conn: sqlite3.Connection, old_status: str, new_status: str, total: float, changed_at: str
+) -> None:
+    record_status_changes(conn, [(old_status, new_status, total)], changed_at)
+
+
+def record_status_changes(conn: sqlite3.Connection, changes: list[tuple[str, str, float]], changed_at: str) -> None:
+    """Apply ``(old_status, new_status, total)`` transitions that happened at ``changed_at``."""
+    by_status: dict[str, list[float]] = {}
+    paid_count, paid_value = 0, 0.0
+    for old_status, new_status, total in changes:
+        if old_status == new_status:
+            continue
+        old_entry = by_status.setdefault(old_status, [0, 0.0])
+        old_entry[0] -= 1
+        old_entry[1] -= total
+        new_entry = by_status.setdefault(new_status, [0, 0.0])
+        new_entry[0] += 1
+        new_entry[1] += total
+        if new_status == "paid":
+            paid_count += 1
+            paid_value += total
+    for status, (count, value) in by_status.items():
+        if count or value:
+            _bump_status(conn, status, int(count), value)
+    if paid_count:
+        _bump_day(conn, _day(changed_at), 0, 0.0, paid_count, paid_value)
+
+
+def read_overview(conn: sqlite3.Connection, days: int) -> dict[str, Any]:
+    rows = conn.execute(
+        "SELECT status, booking_count, gross_value FROM booking_stats WHERE booking_count > 0 ORDER BY status"
+    ).fetchall()
+    daily = conn.execute(
+        "SELECT day, created_count, created_value, paid_count, paid_revenue FROM booking_daily_stats "
+        "ORDER BY day DESC LIMIT ?",
+        (days,),
+    ).fetchall()
+    return {
+        "total_bookings": sum(r["booking_count"] for r in rows),
+        "gross_value": round(sum(r["gross_value"] for r in rows), 2),
+        "paid_revenue": round(sum(r["gross_value"] for r in rows if r["status"] == "paid"), 2),
+        "status_breakdown": [{"status": r["status"], "count": r["booking_count"]} for r in rows],
+        "daily": [
+            {
+                "day": r["day"],
+                "created_count": r["created_count"],
+                "created_value": round(r["created_value"], 2),
+                "paid_count": r["paid_count"],
+                "paid_revenue": round(r["paid_revenue"], 2),
+            }
+            for r in reversed(daily)
+        ],
+    }
+
+
+def compute_from_source(conn: sqlite3.Connection) -> tuple[dict[str, tuple[int, float]], dict[str, list[float]]]:
+    """Recompute both summaries from ``bookings`` and ``audit_events`` with full scans."""
+    by_status = {
+        r[0]: (r[1], r[2])
+        for r in conn.execute("SELECT status, COUNT(*), COALESCE(SUM(total), 0) FROM bookings GROUP BY status")
+    }
+    daily: dict[str, list[float]] = {}
+    for day, count, value in conn.execute(
+        "SELECT substr(created_at, 1, 10), COUNT(*), COALESCE(SUM(total), 0) FROM bookings GROUP BY 1"
+    ):
+        daily[day] = [count, value, 0, 0.0]
+    for day, count, value in conn.execute(
+        f"SELECT substr(p.created_at, 1, 10), COUNT(*), COALESCE(SUM(b.total), 0) "
+        f"FROM ({PAID_EVENTS_SQL}) p JOIN bookings b ON b.id = p.booking_id GROUP BY 1"
+    ):
+        entry = daily.setdefault(day, [0, 0.0, 0, 0.0])
+        entry[2], entry[3] = count, value
+    return by_status, daily
+
+
+def verify(conn: sqlite3.Connection) -> list[str]:
+    """Return a human-readable line per summary value that drifted from the source tables."""
+    expected_status, expected_daily = compute_from_source(conn)
+    stored_status = {
+        r[0]: (r[1], r[2]) for r in conn.execute("SELECT status, booking_count, gross_value FROM booking_stats")
+    }
+    stored_daily = {
+        r[0]: list(r[1:])
+        for r in conn.execute(
+            "SELECT day, created_count, created_value, paid_count, paid_revenue FROM booking_daily_stats"
+        )
+    }
+    drift: list[str] = []
+    for status in sorted(set(expected_status) | set(stored_status)):
+        want = expected_status.get(status, (0, 0.0))
+        have = stored_status.get(status, (0, 0.0))
+        if want[0] != have[0] or abs(want[1] - have[1]) > 0.005:
+            drift.append(f"status={status} expected count={want[0]} value={want[1]:.2f}, stored count={have[0]} value={have[1]:.2f}")
+    for day in sorted(set(expected_daily) | set(stored_daily)):
+        want_day = expected_daily.get(day, [0, 0.0, 0, 0.0])
+        have_day = stored_daily.get(day, [0, 0.0, 0, 0.0])
+        if want_day[0] != have_day[0] or want_day[2] != have_day[2] or any(
+            abs(want_day[i] - have_day[i]) > 0.005 for i in (1, 3)
+        ):
+            drift.append(f"day={day} expected {want_day}, stored {have_day}")
+    return drift
+
+
+def rebuild(conn: sqlite3.Connection) -> None:
+    """Replace both summaries with a full recomputation. Runs in the caller's transaction."""
+    by_status, daily = compute_from_source(conn)
+    conn.execute("DELETE FROM booking_stats")
+    conn.execute("DELETE FROM booking_daily_stats")
+    conn.executemany(
+        "INSERT INTO booking_stats (status, booking_count, gross_value) VALUES (?, ?, ?)",
+        [(status, count, value) for status, (count, value) in by_status.items()],
+    )
+    conn.executemany(
+        "INSERT INTO booking_daily_stats (day, created_count, created_value, paid_count, paid_revenue) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(day, *values) for day, values in daily.items()],
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify or rebuild the booking summary tables.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=Path(os.getenv("HSS_DB_PATH") or Path(__file__).with_name("hss.db")),
+        help="SQLite database path (defaults to $HSS_DB_PATH, like the server)",
+    )
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        # A deferred transaction is one consistent WAL read snapshot and does not block booking writes;
+        # only a rebuild needs the write lock, held from before the check so nothing commits in between.
+        conn.execute("BEGIN IMMEDIATE" if args.command == "rebuild" else "BEGIN")
+        drift = verify(conn)
+        for line in drift:
+            print(f"drift: {line}")
+        if args.command == "rebuild":
+            rebuild(conn)
+            conn.commit()
+            print(f"rebuilt booking summaries ({len(drift)} drifted value(s) corrected)")
+            return 0
+        conn.rollback()
+        print("booking summaries match source tables" if not drift else f"{len(drift)} drifted value(s)")
+        return 1 if drift else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Bounded in-process cache for pre-serialized read responses.
+
+Entries are JSON bodies keyed by a tuple whose first element is a namespace,
+e.g. ``("booking", booking_id)`` or ``("staff_queue",)``. The cache is an LRU
+capped by total size in bytes, and every entry also expires after a TTL.
+
+Write paths invalidate affected keys explicitly after their transaction
+commits. Readers take a ``generation()`` token before querying and pass it to
+``put``; if any invalidation happened in between, the value may be stale and
+is not stored.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable
+
+# Rough per-entry bookkeeping cost (key tuple, OrderedDict node, timestamps).
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 30.0) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[Hashable, ...], tuple[float, bytes, int]] = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: tuple[Hashable, ...]) -> bytes | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, body, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: tuple[Hashable, ...], body: bytes, generation: int) -> None:
+        if not self.enabled:
+            return
+        size = len(body) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, keys: Iterable[tuple[Hashable, ...]] = (), namespaces: Iterable[str] = ()) -> None:
+        """Drop ``keys`` and every key in ``namespaces``."""
+        namespaces = set(namespaces)
+        with self._lock:
+            self._generation += 1
+            doomed = [key for key in keys if key in self._entries]
+            if namespaces:
+                doomed += [key for key in self._entries if key[0] in namespaces]
+            for key in set(doomed):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: tuple[Hashable, ...]) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def render_metrics(self) -> str:
+        """Prometheus text lines for the cache counters."""
+        stats = self.stats()
+        lines = []
+        for name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+            lines += [f"# TYPE hss_cache_{name}_total counter", f"hss_cache_{name}_total {stats[name]}"]
+        for name in ("entries", "bytes", "max_bytes"):
+            lines += [f"# TYPE hss_cache_{name} gauge", f"hss_cache_{name} {stats[name]}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,160 @@
+"""Booking change feed over the ``audit_events`` id sequence.
+
+Every booking write appends audit rows in the same transaction, so the
+autoincrement ``audit_events.id`` is a total order of committed changes. A
+client reads a snapshot (the staff queue or an admin bookings page, both of
+which carry ``last_event_id``), then applies the feed events that follow it.
+
+Events are served two ways:
+
+* ``read_changes`` pages through events after a cursor, for ``?since=`` polling.
+* ``ChangeFeed.open_stream`` yields them as Server-Sent Events. The stream
+  waits on an in-process notifier and also re-reads the table every
+  ``poll_seconds``, so writes committed by other prefork workers arrive too.
+
+Each open stream holds one server thread while it waits, so the number of
+concurrent streams is capped.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator
+
+from admission import ReleasingStream
+from database import ConnectionPool
+
+FEED_EVENT_TYPES = ("booking_submitted", "staff_booking_approved", "payment_captured", "status_updated")
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+CONTENT_TYPE = "text/event-stream; charset=utf-8"
+
+
+def latest_event_id(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM audit_events").fetchone()[0]
+
+
+def read_changes(
+    conn: sqlite3.Connection, since_id: int, limit: int = DEFAULT_PAGE_SIZE
+) -> tuple[list[dict[str, Any]], int, bool]:
+    """Return ``(events, next cursor, has_more)`` for feed events with ``id > since_id``.
+
+    Each event carries the booking's current row, so clients can upsert it
+    instead of replaying the transition themselves.
+    """
+    head = latest_event_id(conn)
+    placeholders = ",".join("?" for _ in FEED_EVENT_TYPES)
+    rows = conn.execute(
+        f"SELECT id, event_type, booking_id, payload, created_at FROM audit_events "
+        f"WHERE id > ? AND id <= ? AND event_type IN ({placeholders}) ORDER BY id LIMIT ?",
+        (since_id, head, *FEED_EVENT_TYPES, limit),
+    ).fetchall()
+    booking_ids = sorted({row["booking_id"] for row in rows if row["booking_id"]})
+    bookings: dict[str, dict[str, Any]] = {}
+    if booking_ids:
+        marks = ",".join("?" for _ in booking_ids)
+        for booking in conn.execute(f"SELECT * FROM bookings WHERE id IN ({marks})", booking_ids):
+            bookings[booking["id"]] = dict(booking)
+    events = [
+        {
+            "id": row["id"],
+            "type": row["event_type"],
+            "booking_id": row["booking_id"],
+            "created_at": row["created_at"],
+            "data": json.loads(row["payload"]),
+            "booking": bookings.get(row["booking_id"]),
+        }
+        for row in rows
+    ]
+    if len(rows) == limit:
+        return events, rows[-1]["id"], True
+    # Nothing else is visible up to ``head``, so the cursor can skip any unrelated events.
+    return events, max(head, since_id), False
+
+
+def encode_event(event: dict[str, Any]) -> bytes:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+
+
+class ChangeFeed:
+    """Wakes SSE streams on local commits and caps how many are open at once."""
+
+    def __init__(
+        self,
+        max_streams: int = 8,
+        poll_seconds: float = 2.0,
+        heartbeat_seconds: float = 15.0,
+        stream_seconds: float = 300.0,
+        retry_ms: int = 3000,
+    ) -> None:
+        self.max_streams = max(0, max_streams)
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stream_seconds = stream_seconds
+        self.retry_ms = retry_ms
+        self._condition = threading.Condition()
+        self._version = 0
+        self._open = 0
+        self._closed = False
+
+    def notify(self) -> None:
+        """Signal that a booking change committed in this process."""
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """End every open stream at its next wake-up; used on shutdown."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def render_metrics(self) -> str:
+        """Prometheus text lines for the stream gauges."""
+        return (
+            "# TYPE hss_feed_open_streams gauge\n"
+            f"hss_feed_open_streams {self._open}\n"
+            "# TYPE hss_feed_max_streams gauge\n"
+            f"hss_feed_max_streams {self.max_streams}\n"
+        )
+
+    def open_stream(self, pool: ConnectionPool, since_id: int) -> ReleasingStream | None:
+        """Start an SSE stream after ``since_id``, or return ``None`` when every slot is taken."""
+        with self._condition:
+            if self._closed or self._open >= self.max_streams:
+                return None
+            self._open += 1
+        return ReleasingStream(self._events(pool, since_id), self._release_slot)
+
+    def _release_slot(self) -> None:
+        with self._condition:
+            self._open -= 1
+
+    def _wait(self, version: int, timeout: float) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != version or self._closed, timeout)
+
+    def _events(self, pool: ConnectionPool, cursor: int) -> Iterator[bytes]:
+        yield f"retry: {self.retry_ms}\n\n".encode("ascii")
+        started = last_sent = time.monotonic()
+        while not self._closed:
+            version = self._version
+            with pool.connection() as conn:
+                events, cursor, has_more = read_changes(conn, cursor)
+            for event in events:
+                yield encode_event(event)
+            now = time.monotonic()
+            if events:
+                last_sent = now
+            if has_more:
+                continue
+            if now - started >= self.stream_seconds:
+                # Ending the stream makes clients reconnect with Last-Event-ID, which spreads them across workers.
+                return
+            if now - last_sent >= self.heartbeat_seconds:
+                yield b": keep-alive\n\n"
+                last_sent = now
+            self._wait(version, min(self.poll_seconds, self.heartbeat_seconds))
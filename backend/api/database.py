@@ -0,0 +1,121 @@
+"""SQLite connection management for the backend API.
+
+Connections are long-lived and shared through a small bounded pool instead of
+being opened per request. Every pooled connection is configured with the same
+pragmas so readers and writers behave consistently under WAL.
+"""
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+# Per-connection pragmas. journal_mode is persistent and is set once in init_db.
+DEFAULT_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": "-16000",  # ~16 MB page cache per connection
+    "mmap_size": "268435456",  # 256 MB
+    "temp_store": "MEMORY",
+}
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no pooled connection becomes available within the timeout."""
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections.
+
+    Connections are opened lazily up to ``size`` and handed out to one thread at
+    a time. ``connection()`` commits on success and rolls back on error, which
+    mirrors the ``with sqlite3.connect(...)`` blocks it replaces.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        size: int = 8,
+        acquire_timeout: float = 10.0,
+        busy_timeout_ms: int = 5000,
+        pragmas: dict[str, str] | None = None,
+        factory: type[sqlite3.Connection] = sqlite3.Connection,
+    ) -> None:
+        self.path = Path(path)
+        self.size = max(1, size)
+        self.acquire_timeout = acquire_timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.factory = factory
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            factory=self.factory,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty as exc:
+            raise PoolExhaustedError(f"no database connection available after {self.acquire_timeout}s") from exc
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            # Explicit call (not ``with conn``) so connection subclasses can observe the commit.
+            conn.commit()
+        finally:
+            self._release(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._opened -= 1
+
+    def close(self) -> None:
+        """Close every idle connection (used on shutdown)."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
@@ -0,0 +1,149 @@
+"""Streaming exports of bookings and audit events.
+
+Rows are read from the cursor in chunks and encoded one at a time, so memory
+stays flat no matter how many rows an export covers.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import sqlite3
+from datetime import date, timedelta
+from typing import Any, Iterable, Iterator
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+FETCH_SIZE = 500
+
+BOOKING_COLUMNS = [
+    "id",
+    "customer_name",
+    "email",
+    "pickup_date",
+    "pickup_window",
+    "address",
+    "duration_months",
+    "item_count",
+    "monthly_subtotal",
+    "handling_fee",
+    "total",
+    "status",
+    "created_at",
+    "updated_at",
+    "payment_reference",
+]
+ITEM_COLUMNS = ["item_type", "item_name", "s3_key"]
+AUDIT_COLUMNS = ["id", "event_type", "booking_id", "payload", "created_at"]
+
+
+def parse_date_range(date_from: str | None, date_to: str | None) -> tuple[str | None, str | None]:
+    """Turn inclusive ``YYYY-MM-DD`` bounds into a half-open ``created_at`` range."""
+    try:
+        start = date.fromisoformat(date_from).isoformat() if date_from else None
+        end = (date.fromisoformat(date_to) + timedelta(days=1)).isoformat() if date_to else None
+    except ValueError as exc:
+        raise ValueError("from and to must be dates in YYYY-MM-DD format") from exc
+    return start, end
+
+
+def _where(filters: list[tuple[str, Any]]) -> tuple[str, list[Any]]:
+    active = [(clause, value) for clause, value in filters if value is not None]
+    if not active:
+        return "", []
+    return "WHERE " + " AND ".join(clause for clause, _ in active) + " ", [value for _, value in active]
+
+
+def _chunks(cursor: sqlite3.Cursor) -> Iterator[list[sqlite3.Row]]:
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        yield rows
+
+
+def iter_bookings(
+    conn: sqlite3.Connection,
+    status: str | None,
+    created_from: str | None,
+    created_before: str | None,
+    include_items: bool,
+) -> Iterator[dict[str, Any]]:
+    where, params = _where(
+        [("status = ?", status), ("created_at >= ?", created_from), ("created_at < ?", created_before)]
+    )
+    cursor = conn.execute(f"SELECT * FROM bookings {where}ORDER BY created_at, id", params)
+    for rows in _chunks(cursor):
+        items: dict[str, list[dict[str, Any]]] = {}
+        if include_items:
+            placeholders = ",".join("?" for _ in rows)
+            for item in conn.execute(
+                f"SELECT booking_id, item_type, item_name, s3_key FROM booking_items "
+                f"WHERE booking_id IN ({placeholders}) ORDER BY id",
+                [r["id"] for r in rows],
+            ):
+                items.setdefault(item["booking_id"], []).append({key: item[key] for key in ITEM_COLUMNS})
+        for row in rows:
+            booking = {key: row[key] for key in row.keys()}
+            if include_items:
+                booking["items"] = items.get(row["id"], [])
+            yield booking
+
+
+def iter_audit_events(
+    conn: sqlite3.Connection,
+    event_type: str | None,
+    booking_id: str | None,
+    created_from: str | None,
+    created_before: str | None,
+) -> Iterator[dict[str, Any]]:
+    where, params = _where(
+        [
+            ("event_type = ?", event_type),
+            ("booking_id = ?", booking_id),
+            ("created_at >= ?", created_from),
+            ("created_at < ?", created_before),
+        ]
+    )
+    cursor = conn.execute(f"SELECT * FROM audit_events {where}ORDER BY id", params)
+    for rows in _chunks(cursor):
+        for row in rows:
+            event = {key: row[key] for key in row.keys()}
+            event["payload"] = json.loads(event["payload"])
+            yield event
+
+
+def encode_ndjson(records: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    for record in records:
+        yield (json.dumps(record) + "\n").encode("utf-8")
+
+
+def encode_csv(records: Iterable[dict[str, Any]], columns: list[str]) -> Iterator[bytes]:
+    """Encode records as CSV. A nested ``items`` list becomes one row per item."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    with_items = False
+    wrote_header = False
+    for record in records:
+        if not wrote_header:
+            with_items = "items" in record
+            writer.writerow(columns + (ITEM_COLUMNS if with_items else []))
+            wrote_header = True
+        values = [record.get(key) for key in columns]
+        values = [json.dumps(v) if isinstance(v, (dict, list)) else v for v in values]
+        if with_items:
+            for item in record["items"] or [{}]:
+                writer.writerow(values + [item.get(key) for key in ITEM_COLUMNS])
+        else:
+            writer.writerow(values)
+        yield drain()
+    if not wrote_header:
+        writer.writerow(columns)
+        yield drain()
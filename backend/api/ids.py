@@ -0,0 +1,91 @@
+"""Collision-free, time-ordered identifiers for bookings and payments.
+
+IDs are 128-bit values rendered as 26 Crockford base32 characters, like a
+ULID, so they sort lexicographically in creation order:
+
+- 48 bits: milliseconds since the Unix epoch
+- 32 bits: node id, re-derived after ``fork``. It is random per process unless
+  ``HSS_NODE_ID`` (0-65535, one per host) is set; then it is that host id
+  followed by the low 16 bits of the process id
+- 48 bits: per-process sequence, reset every millisecond
+
+The time component never goes backwards within a process, even if the wall
+clock does, so IDs from one process are strictly increasing.
+"""
+
+from __future__ import annotations
+
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_NODE_BITS = 32
+_SEQUENCE_BITS = 48
+_SEQUENCE_MASK = (1 << _SEQUENCE_BITS) - 1
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(26):
+        chars.append(CROCKFORD[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _decode(text: str) -> int:
+    value = 0
+    for char in text.upper():
+        value = (value << 5) | CROCKFORD.index(char)
+    return value
+
+
+class IdGenerator:
+    def __init__(self, host_id: int | None = None) -> None:
+        self._host_id = host_id
+        self.reseed()
+
+    def reseed(self) -> None:
+        """Derive a fresh node id and reset the clock state (called in forked children)."""
+        if self._host_id is None:
+            self.node = secrets.randbits(_NODE_BITS)
+        else:
+            self.node = ((self._host_id & 0xFFFF) << 16) | (os.getpid() & 0xFFFF)
+        self._last_ms = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def new(self, prefix: str) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                self._sequence = (self._sequence + 1) & _SEQUENCE_MASK
+                if self._sequence == 0:
+                    self._last_ms += 1
+            value = (self._last_ms << (_NODE_BITS + _SEQUENCE_BITS)) | (self.node << _SEQUENCE_BITS) | self._sequence
+        return f"{prefix}-{_encode(value)}"
+
+
+def timestamp_of(identifier: str) -> datetime:
+    """Creation time encoded in an ID produced by ``IdGenerator``."""
+    value = _decode(identifier.rsplit("-", 1)[-1])
+    return datetime.fromtimestamp((value >> (_NODE_BITS + _SEQUENCE_BITS)) / 1000, timezone.utc)
+
+
+_node_env = os.getenv("HSS_NODE_ID", "").strip()
+_GENERATOR = IdGenerator(int(_node_env) if _node_env else None)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_GENERATOR.reseed)
+
+
+def new_booking_id() -> str:
+    return _GENERATOR.new("HSS")
+
+
+def new_payment_reference() -> str:
+    return _GENERATOR.new("PAY")
@@ -0,0 +1,154 @@
+"""AWS Lambda adapter: serves API Gateway proxy events with ``ApiHandler``.
+
+Configure the function with ``Handler: lambda_handler.handler`` and a package
+containing ``backend/api``. Both API Gateway payload formats are accepted: the
+REST API proxy format (1.0, what ``hss-stack.yaml`` deploys) and the HTTP API
+format (2.0).
+
+Cold starts only pay for what every invocation needs:
+
+* ``server`` and its stdlib imports load once per container, at init.
+  ``boto3`` is not imported until the first event is published, so read-only
+  staff and admin invocations never load it.
+* The connection pool, publisher, writer thread and migrations check are set
+  up by the first invocation and reused by every warm one.
+
+Storage is SQLite in the container's ``/tmp``: each container has its own
+database, which is lost when the container is recycled. Run the function with
+a reserved concurrency of 1 for a single consistent database, and do not point
+``HSS_DB_PATH`` at EFS. ``init_db`` turns on WAL, which needs shared memory on
+one host, and SQLite locking is not reliable on network filesystems either, so
+several containers sharing one file risk corrupting it. Shared data needs the
+move to RDS.
+
+Lambda freezes a container between invocations, so nothing may be left for a
+background thread to finish after ``handler`` returns. Business events
+committed by a write are published from the outbox before the response is
+returned, and anything left over is retried by the next write. The analytics
+snapshot is not started, and the SSE change stream answers ``501``: clients
+poll ``GET /api/v1/changes`` instead.
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import time
+from email.message import Message
+from typing import Any
+from urllib.parse import urlencode, urlparse
+
+# The deployment package is read-only. /tmp is local to this container; never share the file (see above).
+os.environ.setdefault("HSS_DB_PATH", "/tmp/hss.db")
+
+import negotiation  # noqa: E402
+import server  # noqa: E402
+
+# Seconds a write invocation may spend publishing its outbox events before it answers.
+OUTBOX_DRAIN_SECONDS = float(os.getenv("HSS_LAMBDA_DRAIN_SECONDS", "2"))
+# Responses are returned whole, so routes that never finish are refused.
+UNSUPPORTED_ROUTES = {("GET", "/api/v1/changes/stream")}
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_started = False
+
+
+def _start() -> None:
+    """Build the runtime once per container; warm invocations reuse it."""
+    global _started
+    if _started:
+        return
+    server.init_db()
+    server.WRITER.start()
+    if server.SNAPSHOT is not None:
+        # Its refresher thread would only run while an invocation does; reports read the live database instead.
+        print("[lambda] HSS_ANALYTICS_SNAPSHOT is ignored on Lambda")
+        server.SNAPSHOT = None
+    _started = True
+
+
+def to_request(event: dict[str, Any]) -> server.Request:
+    """Translate an API Gateway proxy event (payload format 1.0 or 2.0) into a ``Request``."""
+    headers = Message()
+    if event.get("version") == "2.0":
+        method = event["requestContext"]["http"]["method"]
+        target = event.get("rawPath") or "/"
+        if event.get("rawQueryString"):
+            target += "?" + event["rawQueryString"]
+        header_items = [(name, value) for name, value in (event.get("headers") or {}).items()]
+        if event.get("cookies"):
+            header_items.append(("Cookie", "; ".join(event["cookies"])))
+    else:
+        method = event.get("httpMethod") or "GET"
+        target = event.get("path") or "/"
+        query = event.get("multiValueQueryStringParameters") or {
+            name: [value] for name, value in (event.get("queryStringParameters") or {}).items()
+        }
+        if query:
+            target += "?" + urlencode([(name, value) for name, values in query.items() for value in values])
+        multi = event.get("multiValueHeaders") or {
+            name: [value] for name, value in (event.get("headers") or {}).items()
+        }
+        header_items = [(name, value) for name, values in multi.items() for value in values]
+    for name, value in header_items:
+        # API Gateway compresses responses itself; a compressed body would have to go back base64-encoded.
+        if name.lower() != "accept-encoding":
+            headers[name] = value
+    body = event.get("body") or ""
+    raw = base64.b64decode(body) if event.get("isBase64Encoded") else body.encode("utf-8")
+    return server.Request(method.upper(), target, headers, raw)
+
+
+def to_proxy_response(response: server.Response) -> dict[str, Any]:
+    """Translate a ``Response`` into an API Gateway proxy result, reading a streamed body to the end."""
+    body = response.body
+    if response.stream is not None:
+        try:
+            body = b"".join(response.stream)
+        finally:
+            close = getattr(response.stream, "close", None)
+            if close is not None:
+                close()
+    headers: dict[str, str] = {}
+    content_type = ""
+    for name, value in response.headers:
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        if name.lower() == "content-type":
+            content_type = value
+    binary = not negotiation.compressible(content_type) and bool(body)
+    return {
+        "statusCode": int(response.status),
+        "headers": headers,
+        "body": base64.b64encode(body).decode("ascii") if binary else body.decode("utf-8"),
+        "isBase64Encoded": binary,
+    }
+
+
+def _drain_outbox(context: Any) -> None:
+    """Publish committed events now: a frozen container cannot deliver them after the response."""
+    budget = OUTBOX_DRAIN_SECONDS
+    remaining_ms = getattr(context, "get_remaining_time_in_millis", None)
+    if remaining_ms is not None:
+        budget = min(budget, remaining_ms() / 1000 - 1)
+    deadline = time.monotonic() + budget
+    try:
+        while time.monotonic() < deadline and server.DISPATCHER.run_once():
+            pass
+    except Exception as exc:  # noqa: BLE001
+        print(f"[lambda] outbox drain failed: {exc!r}")
+
+
+def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+    """Lambda entry point for API Gateway proxy integrations."""
+    _start()
+    request = to_request(event)
+    api = server.ApiHandler(request)
+    method = "GET" if request.method == "HEAD" else request.method
+    if (method, urlparse(request.target).path) in UNSUPPORTED_ROUTES:
+        response = api.reject(501, "not_supported", "Streaming is not available here; poll GET /api/v1/changes")
+    else:
+        response = api.dispatch()
+    result = to_proxy_response(response)
+    if request.method not in READ_METHODS and response.status < 400:
+        _drain_outbox(context)
+    return result
@@ -1,23 +1,48 @@
 """Messaging integration for backend business events.
 
 Supports an optional AWS SNS publisher that can fan-out booking lifecycle events
-for downstream services (notifications, analytics, workflow automation).
+for downstream services (notifications, analytics, workflow automation), and an
+asynchronous wrapper that moves publishing off the request thread.
 """
 
 from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any, Protocol
 
+SNS_BATCH_LIMIT = 10
+OVERFLOW_POLICIES = {"block", "drop_oldest", "spill"}
+
 
 class Publisher(Protocol):
     def publish(self, event_type: str, booking_id: str | None, payload: dict[str, Any]) -> None:
         """Publish a business event."""
 
 
+@dataclass
+class BusinessEvent:
+    event_type: str
+    booking_id: str | None
+    payload: dict[str, Any]
+    occurred_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    def envelope(self) -> dict[str, Any]:
+        return {
+            "source": "hss-backend-api",
+            "event_type": self.event_type,
+            "booking_id": self.booking_id,
+            "occurred_at": self.occurred_at,
+            "payload": self.payload,
+        }
+
+
 class NoopPublisher:
     """Fallback publisher when messaging integration is disabled."""
 
@@ -25,38 +50,277 @@ class NoopPublisher:
         return
 
 
+def _message_attributes(event: BusinessEvent) -> dict[str, Any]:
+    return {
+        "event_type": {"DataType": "String", "StringValue": event.event_type},
+        "booking_id": {"DataType": "String", "StringValue": event.booking_id or "-"},
+    }
+
+
 @dataclass
 class SNSPublisher:
     topic_arn: str
     region: str
+    client: Any = field(default=None, repr=False)
+    _client_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
 
-    def __post_init__(self) -> None:
-        import boto3
+    def _sns(self) -> Any:
+        """The SNS client, created on first use: importing boto3 adds hundreds of ms to a Lambda cold start."""
+        if self.client is None:
+            with self._client_lock:
+                if self.client is None:
+                    import boto3
 
-        self._client = boto3.client("sns", region_name=self.region)
+                    self.client = boto3.client("sns", region_name=self.region)
+        return self.client
 
     def publish(self, event_type: str, booking_id: str | None, payload: dict[str, Any]) -> None:
-        envelope = {
-            "source": "hss-backend-api",
-            "event_type": event_type,
-            "booking_id": booking_id,
-            "occurred_at": datetime.now(timezone.utc).isoformat(),
-            "payload": payload,
-        }
-        self._client.publish(
+        event = BusinessEvent(event_type, booking_id, payload)
+        self._sns().publish(
             TopicArn=self.topic_arn,
             Subject=f"hss.{event_type}",
-            Message=json.dumps(envelope),
-            MessageAttributes={
-                "event_type": {"DataType": "String", "StringValue": event_type},
-                "booking_id": {"DataType": "String", "StringValue": booking_id or "-"},
-            },
+            Message=json.dumps(event.envelope()),
+            MessageAttributes=_message_attributes(event),
         )
 
+    def publish_batch(self, events: list[BusinessEvent]) -> list[BusinessEvent]:
+        """Publish up to ``SNS_BATCH_LIMIT`` events in one call and return the ones SNS rejected."""
+        entries = [
+            {
+                "Id": str(index),
+                "Subject": f"hss.{event.event_type}",
+                "Message": json.dumps(event.envelope()),
+                "MessageAttributes": _message_attributes(event),
+            }
+            for index, event in enumerate(events[:SNS_BATCH_LIMIT])
+        ]
+        response = self._sns().publish_batch(TopicArn=self.topic_arn, PublishBatchRequestEntries=entries)
+        return [events[int(failed["Id"])] for failed in response.get("Failed", [])]
+
+
+class FakeSNSClient:
+    """In-memory stand-in for the boto3 SNS client, for local runs and tests.
+
+    ``fail_next(n)`` makes the next ``n`` calls raise, to exercise retry paths.
+    """
+
+    def __init__(self) -> None:
+        self.messages: list[dict[str, Any]] = []
+        self.calls = 0
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    def fail_next(self, count: int = 1) -> None:
+        with self._lock:
+            self._failures += count
+
+    def _check_failure(self) -> None:
+        with self._lock:
+            self.calls += 1
+            if self._failures:
+                self._failures -= 1
+                raise ConnectionError("simulated SNS failure")
+
+    def publish(self, **kwargs: Any) -> dict[str, Any]:
+        self._check_failure()
+        with self._lock:
+            self.messages.append(kwargs)
+            return {"MessageId": str(len(self.messages))}
+
+    def publish_batch(self, TopicArn: str, PublishBatchRequestEntries: list[dict[str, Any]]) -> dict[str, Any]:  # noqa: N803
+        self._check_failure()
+        with self._lock:
+            for entry in PublishBatchRequestEntries:
+                self.messages.append({"TopicArn": TopicArn, **entry})
+        return {"Successful": [{"Id": entry["Id"]} for entry in PublishBatchRequestEntries], "Failed": []}
+
+
+class AsyncPublisher:
+    """Publish events from a background thread instead of the request thread.
+
+    Events go into a bounded in-memory queue and a worker drains them in batches
+    of up to ``SNS_BATCH_LIMIT``, using ``publish_batch`` when the wrapped
+    publisher has one. Failed batches are retried with exponential backoff.
+    When the queue is full the ``overflow`` policy decides what happens:
+
+    - ``block``: the caller waits up to ``block_timeout`` seconds, then the event is dropped
+    - ``drop_oldest``: the oldest queued event is discarded to make room
+    - ``spill``: the event is appended to ``spill_path`` and replayed once the queue drains
+
+    Events that still fail after ``max_retries`` are spilled when a spill file is
+    configured and dropped otherwise. Delivery order is not guaranteed.
+    """
+
+    def __init__(
+        self,
+        inner: Publisher,
+        max_queue: int = 1000,
+        overflow: str = "block",
+        spill_path: Path | str | None = None,
+        max_retries: int = 5,
+        base_backoff: float = 0.2,
+        max_backoff: float = 5.0,
+        block_timeout: float = 1.0,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {sorted(OVERFLOW_POLICIES)}")
+        if overflow == "spill" and not spill_path:
+            raise ValueError("overflow=spill requires spill_path")
+        self.inner = inner
+        self.max_queue = max(1, max_queue)
+        self.overflow = overflow
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.block_timeout = block_timeout
+        self.stats = {"enqueued": 0, "published": 0, "retried": 0, "dropped": 0, "spilled": 0}
+        self._queue: deque[BusinessEvent] = deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="hss-async-publisher", daemon=True)
+        self._worker.start()
+
+    def publish(self, event_type: str, booking_id: str | None, payload: dict[str, Any]) -> None:
+        event = BusinessEvent(event_type, booking_id, payload)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("publisher is closed")
+            if len(self._queue) >= self.max_queue:
+                if self.overflow == "block":
+                    self._cond.wait_for(lambda: len(self._queue) < self.max_queue, timeout=self.block_timeout)
+                    if len(self._queue) >= self.max_queue:
+                        self.stats["dropped"] += 1
+                        print(f"[messaging] queue full, dropped {event_type} booking={booking_id}")
+                        return
+                elif self.overflow == "drop_oldest":
+                    dropped = self._queue.popleft()
+                    self.stats["dropped"] += 1
+                    print(f"[messaging] queue full, dropped oldest {dropped.event_type} booking={dropped.booking_id}")
+                else:
+                    self._spill([event])
+                    return
+            self._queue.append(event)
+            self.stats["enqueued"] += 1
+            self._cond.notify_all()
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued event has been handled. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._in_flight, timeout=timeout)
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        """Flush outstanding events and stop the worker; owners must call this before exiting."""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def _spill(self, events: list[BusinessEvent]) -> None:
+        # Callers hold self._cond, which also serialises access to the spill file.
+        if not self.spill_path:
+            self.stats["dropped"] += len(events)
+            return
+        with self.spill_path.open("a", encoding="utf-8") as handle:
+            for event in events:
+                handle.write(json.dumps(event.__dict__) + "\n")
+        self.stats["spilled"] += len(events)
+
+    def _replay_spill(self) -> None:
+        # Caller holds self._cond and has checked that the queue is empty.
+        if not self.spill_path or not self.spill_path.exists():
+            return
+        lines = [line for line in self.spill_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+        replay, remainder = lines[: self.max_queue], lines[self.max_queue :]
+        if remainder:
+            self.spill_path.write_text("\n".join(remainder) + "\n", encoding="utf-8")
+        else:
+            self.spill_path.unlink()
+        for line in replay:
+            self._queue.append(BusinessEvent(**json.loads(line)))
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._queue:
+                    self._replay_spill()
+                self._cond.wait_for(lambda: self._queue or self._closed, timeout=1.0)
+                if not self._queue:
+                    if self._closed:
+                        return
+                    continue
+                batch = [self._queue.popleft() for _ in range(min(SNS_BATCH_LIMIT, len(self._queue)))]
+                self._in_flight = len(batch)
+                self._cond.notify_all()
+            failed = self._deliver(batch)
+            with self._cond:
+                self.stats["published"] += len(batch) - len(failed)
+                if failed:
+                    print(f"[messaging] giving up on {len(failed)} event(s) after {self.max_retries} retries")
+                    self._spill(failed)
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _deliver(self, batch: list[BusinessEvent]) -> list[BusinessEvent]:
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            try:
+                pending = self._send(pending)
+            except Exception as exc:  # noqa: BLE001
+                print(f"[messaging] batch publish failed (attempt {attempt + 1}): {exc}")
+            if not pending:
+                return []
+            if attempt < self.max_retries:
+                self.stats["retried"] += 1
+                time.sleep(min(self.max_backoff, self.base_backoff * (2**attempt)))
+        return pending
+
+    def _send(self, events: list[BusinessEvent]) -> list[BusinessEvent]:
+        publish_batch = getattr(self.inner, "publish_batch", None)
+        if publish_batch is not None:
+            return publish_batch(events)
+        failed = []
+        for event in events:
+            try:
+                self.inner.publish(event_type=event.event_type, booking_id=event.booking_id, payload=event.payload)
+            except Exception:  # noqa: BLE001
+                failed.append(event)
+        return failed
+
 
 def build_publisher_from_env() -> Publisher:
+    publisher = build_base_publisher_from_env()
+    if os.getenv("MESSAGE_BUS_ASYNC", "false").lower() not in {"1", "true", "yes"}:
+        return publisher
+    if isinstance(publisher, NoopPublisher):
+        return publisher
+
+    try:
+        return AsyncPublisher(
+            publisher,
+            max_queue=int(os.getenv("MESSAGE_BUS_QUEUE_SIZE", "1000")),
+            overflow=os.getenv("MESSAGE_BUS_OVERFLOW", "block").lower(),
+            spill_path=os.getenv("MESSAGE_BUS_SPILL_PATH", "").strip() or None,
+            max_retries=int(os.getenv("MESSAGE_BUS_MAX_RETRIES", "5")),
+        )
+    except ValueError as exc:
+        print(f"[messaging] Invalid async publisher config ({exc}). Publishing synchronously.")
+        return publisher
+
+
+def build_base_publisher_from_env() -> Publisher:
+    """The publisher selected by ``MESSAGE_BUS_MODE``, never wrapped in ``AsyncPublisher``."""
     mode = os.getenv("MESSAGE_BUS_MODE", "disabled").lower()
 
+    if mode == "fake":
+        return SNSPublisher(topic_arn="arn:aws:sns:local:000000000000:hss-fake", region="local", client=FakeSNSClient())
+
     if mode != "sns":
         return NoopPublisher()
 
@@ -67,8 +331,5 @@ def build_publisher_from_env() -> Publisher:
         print("[messaging] MESSAGE_BUS_MODE=sns but SNS_TOPIC_ARN is not set. Falling back to NoopPublisher.")
         return NoopPublisher()
 
-    try:
-        return SNSPublisher(topic_arn=topic_arn, region=region)
-    except Exception as exc:  # noqa: BLE001
-        print(f"[messaging] Failed to initialize SNS publisher ({exc}). Falling back to NoopPublisher.")
-        return NoopPublisher()
+    # The boto3 client is created on first publish; until it can be, events wait in the outbox and are retried.
+    return SNSPublisher(topic_arn=topic_arn, region=region)
@@ -0,0 +1,115 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+Metrics live in the process that served the request. In prefork mode each
+worker keeps its own registry, so a scrape reflects whichever worker answered.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Upper bounds in seconds; +Inf is implicit.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_INF = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """Per-route request counts, status codes, in-flight gauges and latency histograms."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._requests: dict[tuple[str, str, str], int] = {}
+        self._in_flight: dict[tuple[str, str], int] = {}
+        self._latency: dict[tuple[str, str], Histogram] = {}
+
+    @contextmanager
+    def track(self, method: str, route: str) -> Iterator[dict[str, int]]:
+        """Time a request; the caller stores the final status code in ``outcome["status"]``."""
+        key = (method, route)
+        outcome = {"status": 500}
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        started = time.perf_counter()
+        try:
+            yield outcome
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._in_flight[key] -= 1
+                status_key = (method, route, str(int(outcome["status"])))
+                self._requests[status_key] = self._requests.get(status_key, 0) + 1
+                histogram = self._latency.get(key)
+                if histogram is None:
+                    histogram = self._latency[key] = Histogram(self.buckets)
+                histogram.observe(elapsed)
+
+    def render(self) -> str:
+        with self._lock:
+            requests = sorted(self._requests.items())
+            in_flight = sorted(self._in_flight.items())
+            latency = [(key, list(h.counts), h.total, h.count) for key, h in sorted(self._latency.items())]
+        lines = [
+            "# HELP hss_http_requests_total HTTP requests served, by route and status code.",
+            "# TYPE hss_http_requests_total counter",
+        ]
+        for (method, route, status), value in requests:
+            lines.append(
+                f"hss_http_requests_total{_labels(('method', 'route', 'status'), (method, route, status))} {value}"
+            )
+        lines += [
+            "# HELP hss_http_requests_in_flight Requests currently being handled.",
+            "# TYPE hss_http_requests_in_flight gauge",
+        ]
+        for (method, route), value in in_flight:
+            lines.append(f"hss_http_requests_in_flight{_labels(('method', 'route'), (method, route))} {value}")
+        lines += [
+            "# HELP hss_http_request_duration_seconds Time spent producing a response (headers ready).",
+            "# TYPE hss_http_request_duration_seconds histogram",
+        ]
+        for (method, route), counts, total, count in latency:
+            names, values = ("method", "route"), (method, route)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{float(bound)!r}"'
+                lines.append(f"hss_http_request_duration_seconds_bucket{_labels(names, values, le)} {cumulative}")
+            lines.append(f"hss_http_request_duration_seconds_bucket{_labels(names, values, _INF)} {count}")
+            lines.append(f"hss_http_request_duration_seconds_sum{_labels(names, values)} {total!r}")
+            lines.append(f"hss_http_request_duration_seconds_count{_labels(names, values)} {count}")
+        lines += [
+            "# HELP hss_process_start_time_seconds Start time of the process since the Unix epoch.",
+            "# TYPE hss_process_start_time_seconds gauge",
+            f"hss_process_start_time_seconds {self.started_at!r}",
+        ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,222 @@
+"""Versioned schema migrations for the SQLite store.
+
+Migrations are applied in order at startup and recorded in ``schema_version``.
+Each migration runs in its own ``BEGIN IMMEDIATE`` transaction, so concurrent
+processes starting against the same database apply it exactly once.
+Never edit a released migration; append a new one instead.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+import booking_stats
+import pickup_slots
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...]
+    # Optional data step, run after ``statements`` in the same transaction.
+    backfill: Callable[[sqlite3.Connection], None] | None = None
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "base_schema",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS bookings (
+                id TEXT PRIMARY KEY,
+                customer_name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                pickup_date TEXT NOT NULL,
+                pickup_window TEXT NOT NULL,
+                address TEXT NOT NULL,
+                duration_months INTEGER NOT NULL,
+                item_count INTEGER NOT NULL,
+                monthly_subtotal REAL NOT NULL,
+                handling_fee REAL NOT NULL,
+                total REAL NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                payment_reference TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS booking_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                booking_id TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                item_name TEXT,
+                s3_key TEXT,
+                FOREIGN KEY (booking_id) REFERENCES bookings(id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS audit_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                booking_id TEXT,
+                payload TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "bookings_status_created_at_index",
+        ("CREATE INDEX IF NOT EXISTS idx_bookings_status_created_at ON bookings (status, created_at)",),
+    ),
+    Migration(
+        3,
+        "bookings_created_at_index",
+        ("CREATE INDEX IF NOT EXISTS idx_bookings_created_at ON bookings (created_at)",),
+    ),
+    Migration(
+        4,
+        "booking_items_booking_id_index",
+        ("CREATE INDEX IF NOT EXISTS idx_booking_items_booking_id ON booking_items (booking_id)",),
+    ),
+    Migration(
+        5,
+        "audit_events_booking_id_index",
+        ("CREATE INDEX IF NOT EXISTS idx_audit_events_booking_id ON audit_events (booking_id, id)",),
+    ),
+    Migration(
+        6,
+        "bookings_keyset_indexes",
+        (
+            # Keyset pagination orders by (created_at, id); the id tiebreak must be in the index.
+            "CREATE INDEX IF NOT EXISTS idx_bookings_created_at_id ON bookings (created_at, id)",
+            "CREATE INDEX IF NOT EXISTS idx_bookings_status_created_at_id ON bookings (status, created_at, id)",
+            "DROP INDEX IF EXISTS idx_bookings_created_at",
+            "DROP INDEX IF EXISTS idx_bookings_status_created_at",
+        ),
+    ),
+    Migration(
+        7,
+        "audit_events_event_type_index",
+        ("CREATE INDEX IF NOT EXISTS idx_audit_events_event_type ON audit_events (event_type, id)",),
+    ),
+    Migration(
+        8,
+        "event_outbox",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS event_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                booking_id TEXT,
+                payload TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                available_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                claim_token TEXT,
+                claimed_until REAL,
+                last_error TEXT,
+                delivered_at TEXT
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_event_outbox_pending ON event_outbox (id) WHERE delivered_at IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_event_outbox_delivered_at ON event_outbox (delivered_at) "
+            "WHERE delivered_at IS NOT NULL",
+        ),
+    ),
+    Migration(
+        9,
+        "booking_summary_tables",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS booking_stats (
+                status TEXT PRIMARY KEY,
+                booking_count INTEGER NOT NULL DEFAULT 0,
+                gross_value REAL NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS booking_daily_stats (
+                day TEXT PRIMARY KEY,
+                created_count INTEGER NOT NULL DEFAULT 0,
+                created_value REAL NOT NULL DEFAULT 0,
+                paid_count INTEGER NOT NULL DEFAULT 0,
+                paid_revenue REAL NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+            """,
+        ),
+        backfill=booking_stats.rebuild,
+    ),
+    Migration(
+        10,
+        "pickup_slots",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS pickup_slots (
+                pickup_date TEXT NOT NULL,
+                pickup_window TEXT NOT NULL,
+                booked INTEGER NOT NULL DEFAULT 0,
+                capacity INTEGER,
+                PRIMARY KEY (pickup_date, pickup_window)
+            ) WITHOUT ROWID
+            """,
+        ),
+        backfill=pickup_slots.rebuild,
+    ),
+)
+
+
+def _ensure_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()
+    return int(row[0])
+
+
+def apply_migrations(conn: sqlite3.Connection, migrations: tuple[Migration, ...] = MIGRATIONS) -> list[int]:
+    """Apply every pending migration in version order and return the versions applied."""
+    if conn.in_transaction:
+        conn.commit()
+    applied: list[int] = []
+    start = current_version(conn)
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= start:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock: another process may have got here first.
+            if current_version(conn) >= migration.version:
+                conn.rollback()
+                continue
+            for statement in migration.statements:
+                conn.execute(statement)
+            if migration.backfill is not None:
+                migration.backfill(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (migration.version, migration.name, datetime.now(timezone.utc).isoformat()),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration.version)
+    return applied
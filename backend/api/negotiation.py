@@ -0,0 +1,96 @@
+"""ETags, conditional GET and response compression.
+
+ETags are content hashes. A compressed representation gets its own tag (the
+content-coding is appended), so tags stay strong per RFC 9110.
+Compression is negotiated from ``Accept-Encoding``; only ``gzip`` and
+``deflate`` are offered, and only for textual content types.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import zlib
+from typing import Iterable, Iterator
+
+SUPPORTED_CODINGS = ("gzip", "deflate")
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+COMPRESS_LEVEL = 6
+# zlib ``wbits`` per content-coding: gzip wrapper for ``gzip``, zlib wrapper for HTTP ``deflate``.
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def etag_for(content: bytes, coding: str | None = None) -> str:
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    return f'"{digest}-{coding}"' if coding else f'"{digest}"'
+
+
+def if_none_match(header: str | None, etag: str) -> bool:
+    """True when ``If-None-Match`` matches ``etag`` (weak comparison, as RFC 9110 requires)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the preferred supported coding with a non-zero q-value, or ``None`` for identity."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name] = quality
+    best = None
+    for coding in SUPPORTED_CODINGS:
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > 0 and (best is None or quality > weights.get(best, weights.get("*", 0.0))):
+            best = coding
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, _WBITS[coding])
+    return compressor.compress(body) + compressor.flush()
+
+
+class CompressedStream:
+    """Compresses a streamed body chunk by chunk; ``close()`` always closes the source, even if never started."""
+
+    def __init__(self, chunks: Iterable[bytes], coding: str) -> None:
+        self._source = chunks
+        self._chunks = iter(chunks)
+        self._compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, _WBITS[coding])
+        self._done = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        while not self._done:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._done = True
+                return self._compressor.flush()
+            data = self._compressor.compress(chunk)
+            if data:
+                return data
+        raise StopIteration
+
+    def close(self) -> None:
+        close = getattr(self._source, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,193 @@
+"""Transactional outbox for business events.
+
+Handlers call ``enqueue`` inside the same SQLite transaction as the business
+change, so an event is stored if and only if the change commits. The
+``OutboxDispatcher`` thread claims pending rows in batches, publishes them
+through a ``Publisher`` and marks them delivered. Delivery is at-least-once:
+a row whose claim lease expires (crash, restart) is picked up again.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any
+from uuid import uuid4
+
+from database import ConnectionPool
+from messaging import SNS_BATCH_LIMIT, BusinessEvent, Publisher
+
+
+def enqueue(conn: sqlite3.Connection, event_type: str, booking_id: str | None, payload: dict[str, Any]) -> None:
+    enqueue_many(conn, [(event_type, booking_id, payload)])
+
+
+def enqueue_many(conn: sqlite3.Connection, events: list[tuple[str, str | None, dict[str, Any]]]) -> None:
+    created_at = datetime.now(timezone.utc).isoformat()
+    available_at = time.time()
+    conn.executemany(
+        "INSERT INTO event_outbox (event_type, booking_id, payload, created_at, available_at) VALUES (?, ?, ?, ?, ?)",
+        [
+            (event_type, booking_id, json.dumps(payload), created_at, available_at)
+            for event_type, booking_id, payload in events
+        ],
+    )
+
+
+def outbox_status(conn: sqlite3.Connection) -> dict[str, Any]:
+    pending = conn.execute(
+        "SELECT COUNT(*) AS depth, MIN(created_at) AS oldest, "
+        "COALESCE(SUM(CASE WHEN last_error IS NOT NULL THEN 1 ELSE 0 END), 0) AS retrying, "
+        "COALESCE(MAX(attempts), 0) AS max_attempts "
+        "FROM event_outbox WHERE delivered_at IS NULL"
+    ).fetchone()
+    last_delivered = conn.execute("SELECT MAX(delivered_at) FROM event_outbox WHERE delivered_at IS NOT NULL").fetchone()
+    lag_seconds = 0.0
+    if pending["oldest"]:
+        lag_seconds = (datetime.now(timezone.utc) - datetime.fromisoformat(pending["oldest"])).total_seconds()
+    return {
+        "depth": pending["depth"],
+        "retrying": pending["retrying"],
+        "max_attempts": pending["max_attempts"],
+        "oldest_pending_at": pending["oldest"],
+        "lag_seconds": round(max(lag_seconds, 0.0), 3),
+        "last_delivered_at": last_delivered[0],
+    }
+
+
+class OutboxDispatcher:
+    """Background thread that drains ``event_outbox`` through a publisher."""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        publisher: Publisher,
+        batch_size: int = SNS_BATCH_LIMIT,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 30.0,
+        max_backoff: float = 300.0,
+        retention_seconds: float = 7 * 24 * 3600,
+    ) -> None:
+        self.pool = pool
+        self.publisher = publisher
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_backoff = max_backoff
+        self.retention_seconds = retention_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_purge = 0.0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="hss-outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Hint that new rows were committed so the dispatcher does not wait for the next poll."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop polling after a final best-effort drain."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                while self.run_once() and not self._stop.is_set():
+                    pass
+                self._maybe_purge()
+            except Exception as exc:  # noqa: BLE001
+                print(f"[outbox] dispatch failed: {exc}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        try:
+            deadline = time.monotonic() + self.lease_seconds
+            while self.run_once() and time.monotonic() < deadline:
+                pass
+        except Exception as exc:  # noqa: BLE001
+            print(f"[outbox] final drain failed: {exc}")
+
+    def run_once(self) -> int:
+        """Claim, publish and settle one batch. Returns the number of rows claimed."""
+        token, rows = self._claim()
+        if not rows:
+            return 0
+        events = [BusinessEvent(r["event_type"], r["booking_id"], json.loads(r["payload"]), r["created_at"]) for r in rows]
+        row_ids = {id(event): row["id"] for event, row in zip(events, rows)}
+        try:
+            failed = self._publish(events)
+            failed_ids = {row_ids[id(event)] for event in failed}
+            error = "rejected by publisher" if failed else ""
+        except Exception as exc:  # noqa: BLE001
+            failed_ids = {r["id"] for r in rows}
+            error = str(exc)
+        self._settle(token, rows, failed_ids, error)
+        return len(rows)
+
+    def _claim(self) -> tuple[str, list[sqlite3.Row]]:
+        token = uuid4().hex
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT * FROM event_outbox WHERE delivered_at IS NULL AND available_at <= ? "
+                "AND (claimed_until IS NULL OR claimed_until < ?) ORDER BY id LIMIT ?",
+                (now, now, self.batch_size),
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE event_outbox SET claim_token = ?, claimed_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    [(token, now + self.lease_seconds, r["id"]) for r in rows],
+                )
+        return token, rows
+
+    def _publish(self, events: list[BusinessEvent]) -> list[BusinessEvent]:
+        publish_batch = getattr(self.publisher, "publish_batch", None)
+        if publish_batch is not None:
+            return publish_batch(events)
+        failed = []
+        for event in events:
+            try:
+                self.publisher.publish(event_type=event.event_type, booking_id=event.booking_id, payload=event.payload)
+            except Exception:  # noqa: BLE001
+                failed.append(event)
+        return failed
+
+    def _settle(self, token: str, rows: list[sqlite3.Row], failed_ids: set[int], error: str) -> None:
+        delivered_at = datetime.now(timezone.utc).isoformat()
+        now = time.time()
+        delivered = [(delivered_at, r["id"], token) for r in rows if r["id"] not in failed_ids]
+        retry = [
+            (error[:500], now + min(self.max_backoff, 2 ** (r["attempts"] + 1)), r["id"], token)
+            for r in rows
+            if r["id"] in failed_ids
+        ]
+        with self.pool.connection() as conn:
+            conn.executemany(
+                "UPDATE event_outbox SET delivered_at = ?, claimed_until = NULL WHERE id = ? AND claim_token = ?",
+                delivered,
+            )
+            conn.executemany(
+                "UPDATE event_outbox SET last_error = ?, available_at = ?, claimed_until = NULL "
+                "WHERE id = ? AND claim_token = ?",
+                retry,
+            )
+        if retry:
+            print(f"[outbox] {len(retry)} event(s) failed, will retry: {error}")
+
+    def _maybe_purge(self) -> None:
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        cutoff = datetime.fromtimestamp(now - self.retention_seconds, timezone.utc).isoformat()
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM event_outbox WHERE delivered_at IS NOT NULL AND delivered_at < ?", (cutoff,))
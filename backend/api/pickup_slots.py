@@ -0,0 +1,111 @@
+"""Pickup slot capacity: one row per (pickup date, pickup window).
+
+``pickup_slots.booked`` counts the bookings holding each slot. Booking
+creation reserves it and cancellation releases it, in the same transaction
+as the booking change. Checking capacity or listing availability therefore
+reads a few primary-key rows instead of scanning ``bookings``.
+
+A slot's ``capacity`` is ``NULL`` until an admin overrides it; the server's
+default capacity applies until then. Rows are created on first use, so a
+slot without a row is empty.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Iterable
+
+PICKUP_WINDOWS = ("08:00 – 11:00", "10:00 – 13:00", "13:00 – 16:00")
+# Bookings in these statuses no longer hold their slot.
+RELEASED_STATUSES = ("cancelled",)
+
+
+def reserve(conn: sqlite3.Connection, slots: list[tuple[str, str]], default_capacity: int) -> list[bool]:
+    """Reserve one place per ``(date, window)`` entry, in order; returns whether each one fitted.
+
+    Entries that do not fit reserve nothing. Must run inside the booking write's transaction.
+    """
+    wanted = Counter(slots)
+    available: dict[tuple[str, str], int] = {}
+    for pickup_date, window in wanted:
+        row = conn.execute(
+            "SELECT booked, capacity FROM pickup_slots WHERE pickup_date = ? AND pickup_window = ?",
+            (pickup_date, window),
+        ).fetchone()
+        booked, capacity = (row[0], row[1]) if row else (0, None)
+        available[(pickup_date, window)] = max(0, (default_capacity if capacity is None else capacity) - booked)
+
+    granted = []
+    taken: Counter[tuple[str, str]] = Counter()
+    for slot in slots:
+        fits = taken[slot] < available[slot]
+        if fits:
+            taken[slot] += 1
+        granted.append(fits)
+    conn.executemany(
+        "INSERT INTO pickup_slots (pickup_date, pickup_window, booked) VALUES (?, ?, ?) "
+        "ON CONFLICT (pickup_date, pickup_window) DO UPDATE SET booked = booked + excluded.booked",
+        [(pickup_date, window, count) for (pickup_date, window), count in taken.items()],
+    )
+    return granted
+
+
+def release(conn: sqlite3.Connection, slots: Iterable[tuple[str, str]]) -> None:
+    """Give back one place per ``(date, window)`` entry, e.g. for cancelled bookings."""
+    conn.executemany(
+        "UPDATE pickup_slots SET booked = MAX(booked - ?, 0) WHERE pickup_date = ? AND pickup_window = ?",
+        [(count, pickup_date, window) for (pickup_date, window), count in Counter(slots).items()],
+    )
+
+
+def set_capacity(conn: sqlite3.Connection, pickup_date: str, window: str, capacity: int | None) -> None:
+    """Override one slot's capacity; ``None`` restores the default."""
+    conn.execute(
+        "INSERT INTO pickup_slots (pickup_date, pickup_window, booked, capacity) VALUES (?, ?, 0, ?) "
+        "ON CONFLICT (pickup_date, pickup_window) DO UPDATE SET capacity = excluded.capacity",
+        (pickup_date, window, capacity),
+    )
+
+
+def availability(conn: sqlite3.Connection, start: date, end: date, default_capacity: int) -> list[dict[str, Any]]:
+    """Every slot from ``start`` to ``end`` inclusive, with its capacity, bookings and open places."""
+    stored = {
+        (row[0], row[1]): (row[2], row[3])
+        for row in conn.execute(
+            "SELECT pickup_date, pickup_window, booked, capacity FROM pickup_slots "
+            "WHERE pickup_date BETWEEN ? AND ?",
+            (start.isoformat(), end.isoformat()),
+        )
+    }
+    slots = []
+    day = start
+    while day <= end:
+        for window in PICKUP_WINDOWS:
+            booked, capacity = stored.get((day.isoformat(), window), (0, None))
+            capacity = default_capacity if capacity is None else capacity
+            slots.append(
+                {
+                    "pickup_date": day.isoformat(),
+                    "pickup_window": window,
+                    "capacity": capacity,
+                    "booked": booked,
+                    "available": max(0, capacity - booked),
+                }
+            )
+        day += timedelta(days=1)
+    return slots
+
+
+def rebuild(conn: sqlite3.Connection) -> None:
+    """Recount ``booked`` from ``bookings``, keeping capacity overrides. Full scan; for migrations and repair."""
+    placeholders = ",".join("?" for _ in RELEASED_STATUSES)
+    conn.execute("UPDATE pickup_slots SET booked = 0")
+    conn.execute(
+        "INSERT INTO pickup_slots (pickup_date, pickup_window, booked) "
+        f"SELECT pickup_date, pickup_window, COUNT(*) FROM bookings WHERE status NOT IN ({placeholders}) "
+        "GROUP BY pickup_date, pickup_window "
+        "ON CONFLICT (pickup_date, pickup_window) DO UPDATE SET booked = excluded.booked",
+        RELEASED_STATUSES,
+    )
@@ -0,0 +1,247 @@
+"""Pre-forking process supervisor for the API server.
+
+The supervisor runs migrations once, opens the listening socket and forks N
+workers. Each worker builds and starts its own SQLite pool, publisher, outbox
+dispatcher, writer and analytics snapshot (``server.reset_runtime`` and
+``server.start_runtime``) and serves with the selected engine.
+Workers either accept on the inherited socket or, with ``HSS_REUSEPORT=1``,
+bind their own ``SO_REUSEPORT`` socket so the kernel balances connections.
+
+Signals handled by the supervisor:
+
+- ``SIGTERM`` / ``SIGINT``: stop every worker gracefully, then exit.
+- ``SIGHUP``: rolling restart, replacing one worker at a time and only
+  stopping the old worker once its replacement is serving.
+
+Workers that die unexpectedly are restarted, with backoff if they keep
+crashing right after start.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+
+import server
+
+READY_TIMEOUT = 30.0
+STOP_TIMEOUT = 30.0
+MAX_RESTART_BACKOFF = 30.0
+
+
+@dataclass
+class Worker:
+    pid: int
+    slot: int
+    started_at: float
+
+
+def _listen_socket(port: int, reuse_port: bool) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("0.0.0.0", port))
+    sock.listen(socket.SOMAXCONN)
+    return sock
+
+
+class Supervisor:
+    def __init__(self, port: int, engine: str, workers: int, reuse_port: bool | None = None) -> None:
+        if not hasattr(os, "fork"):
+            raise RuntimeError("prefork mode needs os.fork (POSIX only)")
+        if reuse_port is None:
+            reuse_port = os.getenv("HSS_REUSEPORT", "0") == "1"
+        if reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+            raise RuntimeError("SO_REUSEPORT is not available on this platform")
+        self.port = port
+        self.engine = engine
+        self.size = max(1, workers)
+        self.reuse_port = reuse_port
+        self.workers: dict[int, Worker] = {}
+        self._sock: socket.socket | None = None
+        self._stopping = False
+        self._reload = False
+        self._crashes: dict[int, int] = {}  # slot -> consecutive early crashes
+        self._pending: dict[int, float] = {}  # slot -> monotonic time of the next start attempt
+
+    # -- supervisor ---------------------------------------------------------
+
+    def run(self) -> None:
+        server.init_db()
+        # Nothing that owns a connection or a thread may cross fork().
+        server.POOL.close()
+        close_publisher = getattr(server.PUBLISHER, "close", None)
+        if close_publisher is not None:
+            close_publisher()
+        if not self.reuse_port:
+            # With SO_REUSEPORT every listening socket gets a share of connections,
+            # so only workers may hold one.
+            self._sock = _listen_socket(self.port, False)
+
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        print(f"[prefork] supervisor {os.getpid()} starting {self.size} {self.engine} worker(s) on port {self.port}")
+        try:
+            for slot in range(self.size):
+                self._pending[slot] = 0.0
+            while not self._stopping:
+                if self._reload:
+                    self._reload = False
+                    self._rolling_restart()
+                self._reap()
+                self._restart_due()
+                time.sleep(0.2)
+        finally:
+            self._stop_all()
+            if self._sock is not None:
+                self._sock.close()
+        print("[prefork] supervisor stopped")
+
+    def _on_stop(self, signum: int, frame: object) -> None:
+        self._stopping = True
+
+    def _on_reload(self, signum: int, frame: object) -> None:
+        self._reload = True
+
+    def _spawn(self, slot: int) -> Worker | None:
+        """Fork a worker for ``slot`` and wait until it reports that it is serving."""
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            code = 1
+            try:
+                self._worker_main(ready_w)
+                code = 0
+            except BaseException as exc:  # noqa: BLE001
+                print(f"[prefork] worker {os.getpid()} failed: {exc!r}")
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        os.close(ready_w)
+        worker = Worker(pid, slot, time.monotonic())
+        self.workers[pid] = worker
+        try:
+            readable, _, _ = select.select([ready_r], [], [], READY_TIMEOUT)
+            ready = bool(readable) and os.read(ready_r, 1) == b"1"
+        finally:
+            os.close(ready_r)
+        if not ready:
+            print(f"[prefork] worker {pid} (slot {slot}) did not become ready")
+            self._stop_worker(worker, signal.SIGKILL)
+            return None
+        print(f"[prefork] worker {pid} (slot {slot}) ready")
+        return worker
+
+    def _reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            print(f"[prefork] worker {pid} (slot {worker.slot}) exited with {code}; restarting")
+            crashed_early = time.monotonic() - worker.started_at < 5.0
+            self._crashes[worker.slot] = self._crashes.get(worker.slot, 0) + 1 if crashed_early else 0
+            self._schedule_restart(worker.slot)
+
+    def _schedule_restart(self, slot: int) -> None:
+        failures = self._crashes.get(slot, 0)
+        delay = min(MAX_RESTART_BACKOFF, 0.5 * 2 ** (failures - 1)) if failures else 0.0
+        self._pending[slot] = time.monotonic() + delay
+
+    def _restart_due(self) -> None:
+        now = time.monotonic()
+        for slot, due in sorted(self._pending.items()):
+            if due > now or self._stopping:
+                continue
+            del self._pending[slot]
+            if self._spawn(slot) is None:
+                self._crashes[slot] = self._crashes.get(slot, 0) + 1
+                self._schedule_restart(slot)
+
+    def _rolling_restart(self) -> None:
+        print("[prefork] rolling restart")
+        for old in sorted(list(self.workers.values()), key=lambda w: w.slot):
+            if self._stopping:
+                return
+            if self._spawn(old.slot) is None:
+                print(f"[prefork] keeping worker {old.pid}; its replacement failed to start")
+                continue
+            self._stop_worker(old)
+
+    def _stop_worker(self, worker: Worker, signum: int = signal.SIGTERM) -> None:
+        self.workers.pop(worker.pid, None)
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while time.monotonic() < deadline:
+            pid, _ = os.waitpid(worker.pid, os.WNOHANG)
+            if pid:
+                return
+            time.sleep(0.05)
+        print(f"[prefork] worker {worker.pid} did not stop in {STOP_TIMEOUT}s; killing it")
+        os.kill(worker.pid, signal.SIGKILL)
+        os.waitpid(worker.pid, 0)
+
+    def _stop_all(self) -> None:
+        for worker in list(self.workers.values()):
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.workers.pop(worker.pid, None)
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for worker in list(self.workers.values()):
+            os.kill(worker.pid, signal.SIGKILL)
+            os.waitpid(worker.pid, 0)
+        self.workers.clear()
+
+    # -- worker -------------------------------------------------------------
+
+    def _worker_main(self, ready_fd: int) -> None:
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        # Ctrl-C reaches the whole process group; the supervisor decides how workers stop.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, _raise_system_exit)
+
+        sock = _listen_socket(self.port, True) if self.reuse_port else self._sock
+        server.reset_runtime()
+        server.start_runtime()
+        os.write(ready_fd, b"1")
+        os.close(ready_fd)
+        try:
+            server.serve_engine(self.engine, self.port, sock=sock)
+        except SystemExit:
+            pass
+        finally:
+            server.shutdown()
+
+
+def _raise_system_exit(signum: int, frame: object) -> None:
+    # Unwinds serve_forever in the main thread. server_close then stops accepting and waits up to its grace period
+    # for queued and running requests, so they finish before server.shutdown() and os._exit.
+    raise SystemExit(0)
@@ -0,0 +1,94 @@
+"""Compiled method + path route table.
+
+Patterns are literal paths with ``{name}`` or ``{name:type}`` segments, e.g.
+``/api/v1/bookings/{booking_id}/status``. Each pattern is compiled to one
+regular expression; typed parameters are converted before the handler sees
+them, so ``{limit:int}`` arrives as an ``int``.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable
+
+# type name -> (regex for one value, converter)
+CONVERTERS: dict[str, tuple[str, Callable[[str], Any]]] = {
+    "str": (r"[^/]+", str),
+    "int": (r"-?\d+", int),
+    "path": (r".*", str),
+}
+_PARAM_RE = re.compile(r"\{(?P<name>[A-Za-z_][A-Za-z0-9_]*)(?::(?P<type>[a-z]+))?\}")
+
+
+@dataclass(frozen=True)
+class Route:
+    method: str
+    pattern: str
+    handler: str
+    regex: re.Pattern[str]
+    converters: tuple[tuple[str, Callable[[str], Any]], ...]
+
+
+@dataclass(frozen=True)
+class Match:
+    route: Route
+    params: dict[str, Any]
+
+
+class MethodNotAllowed(LookupError):
+    """The path exists, but not for this method."""
+
+    def __init__(self, allowed: list[str]) -> None:
+        super().__init__(f"allowed methods: {', '.join(allowed)}")
+        self.allowed = allowed
+
+
+def compile_pattern(pattern: str) -> tuple[re.Pattern[str], tuple[tuple[str, Callable[[str], Any]], ...]]:
+    regex = ["^"]
+    converters = []
+    position = 0
+    for param in _PARAM_RE.finditer(pattern):
+        kind = param.group("type") or "str"
+        if kind not in CONVERTERS:
+            raise ValueError(f"unknown parameter type {kind!r} in route {pattern!r}")
+        expression, converter = CONVERTERS[kind]
+        regex.append(re.escape(pattern[position : param.start()]))
+        regex.append(f"(?P<{param.group('name')}>{expression})")
+        converters.append((param.group("name"), converter))
+        position = param.end()
+    regex.append(re.escape(pattern[position:]))
+    regex.append("$")
+    return re.compile("".join(regex)), tuple(converters)
+
+
+class Router:
+    """Ordered route table; the first route whose method and pattern match wins."""
+
+    def __init__(self, routes: list[tuple[str, str, str]] | None = None) -> None:
+        self.routes: list[Route] = []
+        for method, pattern, handler in routes or []:
+            self.add(method, pattern, handler)
+
+    def add(self, method: str, pattern: str, handler: str) -> None:
+        regex, converters = compile_pattern(pattern)
+        self.routes.append(Route(method.upper(), pattern, handler, regex, converters))
+
+    def match(self, method: str, path: str) -> Match | None:
+        """Return the matching route, ``None`` for an unknown path, or raise ``MethodNotAllowed``."""
+        allowed: list[str] = []
+        for route in self.routes:
+            found = route.regex.match(path)
+            if found is None:
+                continue
+            if route.method != method:
+                allowed.append(route.method)
+                continue
+            try:
+                params = {name: convert(found.group(name)) for name, convert in route.converters}
+            except ValueError:
+                continue
+            return Match(route, params)
+        if allowed:
+            raise MethodNotAllowed(sorted(set(allowed)))
+        return None
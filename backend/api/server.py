@@ -3,40 +3,134 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
 import json
+import math
+import os
 import re
+import socket
 import sqlite3
-from datetime import datetime, timezone
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from email.message import Message
 from http import HTTPStatus
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, TypeVar
 from urllib.parse import parse_qs, urlparse
 from uuid import uuid4
 
-from messaging import build_publisher_from_env
+import admission
+import booking_stats
+import cache
+import changefeed
+import exports
+import ids
+import metrics
+import negotiation
+import outbox
+import pickup_slots
+import router
+import snapshot
+import tracing
+import writer
+from database import ConnectionPool
+from messaging import Publisher, build_base_publisher_from_env
+from migrations import apply_migrations
 
-DB_PATH = Path(__file__).with_name("hss.db")
-PUBLISHER = build_publisher_from_env()
+DB_PATH = Path(os.getenv("HSS_DB_PATH") or Path(__file__).with_name("hss.db"))
+T = TypeVar("T")
+
+
+def build_pool() -> ConnectionPool:
+    return ConnectionPool(
+        DB_PATH,
+        size=int(os.getenv("HSS_DB_POOL_SIZE", "8")),
+        busy_timeout_ms=int(os.getenv("HSS_DB_BUSY_TIMEOUT_MS", "5000")),
+        factory=tracing.TracedConnection,
+    )
+
+
+def build_publisher() -> Publisher:
+    # The outbox dispatcher marks rows delivered once publish() returns. AsyncPublisher returns as soon as
+    # the event is queued in memory, so a crash or a dropped event would lose rows already marked as sent.
+    if os.getenv("MESSAGE_BUS_ASYNC", "false").lower() in {"1", "true", "yes"}:
+        print("[messaging] MESSAGE_BUS_ASYNC is ignored: the outbox dispatcher already publishes off the request path")
+    return build_base_publisher_from_env()
+
+
+def build_dispatcher(pool: ConnectionPool, publisher: Publisher) -> outbox.OutboxDispatcher:
+    return outbox.OutboxDispatcher(
+        pool,
+        publisher,
+        poll_interval=float(os.getenv("HSS_OUTBOX_POLL_SECONDS", "1.0")),
+        lease_seconds=float(os.getenv("HSS_OUTBOX_LEASE_SECONDS", "30")),
+    )
+
+
+def build_writer(pool: ConnectionPool) -> writer.WriteQueue:
+    return writer.WriteQueue(
+        pool,
+        max_batch=int(os.getenv("HSS_WRITE_MAX_BATCH", "64")),
+        max_wait=float(os.getenv("HSS_WRITE_MAX_WAIT_MS", "1")) / 1000,
+    )
+
+
+def build_snapshot() -> snapshot.AnalyticsSnapshot | None:
+    if os.getenv("HSS_ANALYTICS_SNAPSHOT", "false").lower() not in {"1", "true", "yes"}:
+        return None
+    return snapshot.AnalyticsSnapshot(
+        DB_PATH,
+        os.getenv("HSS_SNAPSHOT_PATH") or DB_PATH.with_name(f"{DB_PATH.stem}.analytics{DB_PATH.suffix}"),
+        refresh_seconds=float(os.getenv("HSS_SNAPSHOT_SECONDS", "30")),
+        refresh_changes=int(os.getenv("HSS_SNAPSHOT_CHANGES", "500")),
+        factory=tracing.TracedConnection,
+    )
+
+
+POOL = build_pool()
+PUBLISHER = build_publisher()
+DISPATCHER = build_dispatcher(POOL, PUBLISHER)
+WRITER = build_writer(POOL)
+SNAPSHOT = build_snapshot()
 
 STAFF_VISIBLE_STATUSES = ("submitted", "approved", "collected", "in_storage")
-ALLOWED_STATUSES = {"submitted", "approved", "collected", "in_storage", "returned", "paid"}
+ALLOWED_STATUSES = {"submitted", "approved", "collected", "in_storage", "returned", "paid", "cancelled"}
 STATUS_TRANSITIONS = {
-    "submitted": {"approved"},
-    "approved": {"collected", "paid"},
+    "submitted": {"approved", "cancelled"},
+    "approved": {"collected", "paid", "cancelled"},
     "collected": {"in_storage"},
     "in_storage": {"returned"},
     "returned": set(),
     "paid": {"collected"},
+    "cancelled": set(),
 }
 ALLOWED_PAYMENT_METHODS = {"card", "eft", "saved card ending in 1042"}
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+STREAM_FLUSH_BYTES = 64 * 1024
+COMPRESS_MIN_BYTES = int(os.getenv("HSS_COMPRESS_MIN_BYTES", "1024"))
+MAX_BATCH_BOOKINGS = 500
+# Upper bounds for booking pricing, so absurd values are rejected as 400s instead of failing at the insert.
+MAX_PRICING_DURATION = 120
+MAX_PRICING_AMOUNT = 10_000_000
+MAX_BULK_TRANSITIONS = 500
+SLOT_CAPACITY = int(os.getenv("HSS_SLOT_CAPACITY", "20"))
+MAX_AVAILABILITY_DAYS = 92
 
 
 def utc_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def parse_date(value: Any) -> date:
+    """Parse a ``YYYY-MM-DD`` date; raises ``ValueError`` for anything else."""
+    if not isinstance(value, str) or len(value) != 10:
+        raise ValueError(f"invalid date: {value!r}")
+    return date.fromisoformat(value)
+
+
 def infer_role(email: str, requested_role: str | None = None) -> str:
     if requested_role in {"customer", "staff", "admin"}:
         return requested_role
@@ -50,88 +144,585 @@ def infer_role(email: str, requested_role: str | None = None) -> str:
 
 
 def init_db() -> None:
-    with sqlite3.connect(DB_PATH) as conn:
+    with POOL.connection() as conn:
+        # WAL is persistent in the database file; readers no longer block on writers.
+        conn.execute("PRAGMA journal_mode = WAL")
+        apply_migrations(conn)
+
+
+def row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
+    return {key: row[key] for key in row.keys()}
+
+
+def encode_cursor(values: list[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, types: tuple[type, ...]) -> list[Any]:
+    """Decode a client-supplied cursor holding one value of each of ``types``; raises ``ValueError`` otherwise."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("cursor is invalid") from exc
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("cursor is invalid")
+    # ``bool`` is an ``int`` subclass, but ``true`` is never a valid id.
+    if any(isinstance(value, bool) or not isinstance(value, kind) for value, kind in zip(values, types)):
+        raise ValueError("cursor is invalid")
+    return values
+
+
+def fetch_booking_page(
+    conn: sqlite3.Connection, status: str | None, limit: int, offset: int, cursor: str | None
+) -> tuple[list[sqlite3.Row], str | None]:
+    """Newest-first bookings page, keyed on (created_at, id) when a cursor is given."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if cursor:
+        created_at, booking_id = decode_cursor(cursor, (str, str))
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend([created_at, booking_id])
+        offset = 0
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    rows = conn.execute(
+        f"SELECT * FROM bookings {where}ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+        (*params, limit + 1, offset),
+    ).fetchall()
+    next_cursor = encode_cursor([rows[limit - 1]["created_at"], rows[limit - 1]["id"]]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def fetch_audit_page(
+    conn: sqlite3.Connection,
+    event_type: str | None,
+    booking_id: str | None,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+) -> tuple[list[sqlite3.Row], str | None]:
+    """Newest-first audit events page, keyed on id when a cursor is given."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    if event_type:
+        clauses.append("event_type = ?")
+        params.append(event_type)
+    if booking_id:
+        clauses.append("booking_id = ?")
+        params.append(booking_id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, (int,))
+        clauses.append("id < ?")
+        params.append(last_id)
+        offset = 0
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    rows = conn.execute(
+        f"SELECT * FROM audit_events {where}ORDER BY id DESC LIMIT ? OFFSET ?",
+        (*params, limit + 1, offset),
+    ).fetchall()
+    next_cursor = encode_cursor([rows[limit - 1]["id"]]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def invalidate_booking_views(booking_ids: Iterable[str] = ()) -> None:
+    """Drop cached reads that a committed booking write may have changed.
+
+    Call after the transaction commits, never inside it. This also wakes
+    change-feed streams so they pick up the new audit events.
+    """
+    CACHE.invalidate(
+        [("booking", booking_id) for booking_id in booking_ids], namespaces=("staff_queue", "overview", "pickup_slots")
+    )
+    FEED.notify()
+    if SNAPSHOT is not None:
+        SNAPSHOT.notify()
+
+
+@contextmanager
+def report_connection(use_snapshot: bool = True) -> Iterator[tuple[sqlite3.Connection, dict[str, str]]]:
+    """Connection for admin reports, plus the ``data_as_of`` / ``data_source`` fields to return with them.
+
+    Reads the analytics snapshot when it is enabled and has been published, and
+    the live database otherwise.
+    """
+    with SNAPSHOT.connection() if SNAPSHOT is not None and use_snapshot else nullcontext() as published:
+        if published is not None:
+            conn, taken_at = published
+            yield conn, {"data_as_of": taken_at, "data_source": "snapshot"}
+            return
+    with POOL.connection() as conn:
+        yield conn, {"data_as_of": utc_now(), "data_source": "live"}
+
+
+def encode_json(payload: dict[str, Any]) -> bytes:
+    with tracing.span("serialize"):
+        return json.dumps(payload).encode("utf-8")
+
+
+def append_fields(body: bytes, fields: dict[str, Any]) -> bytes:
+    """Add ``fields`` as the last keys of an encoded JSON object."""
+    encoded = json.dumps(fields).encode("utf-8")
+    if encoded == b"{}":
+        return body
+    separator = b"" if body == b"{}" else b", "
+    return body[:-1] + separator + encoded[1:]
+
+
+def append_request_id(body: bytes, request_id: str) -> bytes:
+    """Add ``request_id`` as the last key of an encoded JSON object."""
+    return append_fields(body, {"request_id": request_id})
+
+
+def log_event(conn: sqlite3.Connection, event_type: str, booking_id: str | None, payload: dict[str, Any]) -> None:
+    with tracing.span("audit"):
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS bookings (
-                id TEXT PRIMARY KEY,
-                customer_name TEXT NOT NULL,
-                email TEXT NOT NULL,
-                pickup_date TEXT NOT NULL,
-                pickup_window TEXT NOT NULL,
-                address TEXT NOT NULL,
-                duration_months INTEGER NOT NULL,
-                item_count INTEGER NOT NULL,
-                monthly_subtotal REAL NOT NULL,
-                handling_fee REAL NOT NULL,
-                total REAL NOT NULL,
-                status TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
-                payment_reference TEXT
-            )
-            """
+            "INSERT INTO audit_events (event_type, booking_id, payload, created_at) VALUES (?, ?, ?, ?)",
+            (event_type, booking_id, json.dumps(payload), utc_now()),
         )
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS booking_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                booking_id TEXT NOT NULL,
-                item_type TEXT NOT NULL,
-                item_name TEXT,
-                s3_key TEXT,
-                FOREIGN KEY (booking_id) REFERENCES bookings(id)
-            )
-            """
+
+
+def log_events(conn: sqlite3.Connection, events: list[tuple[str, str | None, dict[str, Any]]]) -> None:
+    now = utc_now()
+    with tracing.span("audit"):
+        conn.executemany(
+            "INSERT INTO audit_events (event_type, booking_id, payload, created_at) VALUES (?, ?, ?, ?)",
+            [(event_type, booking_id, json.dumps(payload), now) for event_type, booking_id, payload in events],
         )
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS audit_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                booking_id TEXT,
-                payload TEXT NOT NULL,
-                created_at TEXT NOT NULL
-            )
-            """
+
+
+def publish_business_event(
+    conn: sqlite3.Connection, event_type: str, booking_id: str | None, payload: dict[str, Any]
+) -> None:
+    """Record a business event in the outbox as part of the caller's transaction.
+
+    The event reaches the message bus once ``DISPATCHER`` picks it up after commit.
+    """
+    with tracing.span("publish"):
+        outbox.enqueue(conn, event_type, booking_id, payload)
+    DISPATCHER.wake()
+
+
+def publish_business_events(conn: sqlite3.Connection, events: list[tuple[str, str | None, dict[str, Any]]]) -> None:
+    with tracing.span("publish"):
+        outbox.enqueue_many(conn, events)
+    DISPATCHER.wake()
+
+
+@dataclass
+class NewBooking:
+    """A validated booking payload converted to ``bookings`` / ``booking_items`` rows."""
+
+    booking_id: str
+    body: dict[str, Any]
+    row: tuple[Any, ...]
+    items: list[tuple[Any, ...]]
+    status: str = "submitted"
+
+    @classmethod
+    def from_payload(cls, booking_id: str, body: dict[str, Any], now: str, status: str = "submitted") -> NewBooking:
+        pricing = body["pricing"]
+        row = (
+            booking_id,
+            body["customer_name"].strip(),
+            body["email"].strip().lower(),
+            body["pickup_date"],
+            body["pickup_window"],
+            body["address"].strip(),
+            int(pricing["duration"]),
+            len(body["items"]),
+            float(pricing["monthlySubtotal"]),
+            float(pricing["handlingFee"]),
+            float(pricing["total"]),
+            status,
+            now,
+            now,
         )
+        items = [
+            (booking_id, item["type"], (item.get("name") or "").strip(), item.get("s3Key", ""))
+            for item in body["items"]
+        ]
+        return cls(booking_id, body, row, items, status)
 
+    @property
+    def slot(self) -> tuple[str, str]:
+        return self.row[3], self.row[4]
 
-def row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
-    return {key: row[key] for key in row.keys()}
+    @property
+    def total(self) -> float:
+        return self.row[10]
 
+    @property
+    def created_at(self) -> str:
+        return self.row[12]
 
-def log_event(conn: sqlite3.Connection, event_type: str, booking_id: str | None, payload: dict[str, Any]) -> None:
-    conn.execute(
-        "INSERT INTO audit_events (event_type, booking_id, payload, created_at) VALUES (?, ?, ?, ?)",
-        (event_type, booking_id, json.dumps(payload), utc_now()),
+
+def reserve_pickup_slots(conn: sqlite3.Connection, bookings: list[NewBooking]) -> list[NewBooking]:
+    """Reserve each booking's pickup slot, in order; returns the bookings whose slot was already full."""
+    granted = pickup_slots.reserve(conn, [b.slot for b in bookings], SLOT_CAPACITY)
+    return [b for b, ok in zip(bookings, granted) if not ok]
+
+
+def slot_full_message(booking: NewBooking) -> str:
+    return f"Pickup slot {booking.slot[0]} {booking.slot[1]} is full"
+
+
+def insert_bookings(conn: sqlite3.Connection, bookings: list[NewBooking]) -> int:
+    """Insert bookings, their items, summary updates, audit rows and outbox events in bulk; returns the count.
+
+    Callers reserve the pickup slots first, with ``reserve_pickup_slots``.
+    """
+    conn.executemany(
+        """
+        INSERT INTO bookings (
+            id, customer_name, email, pickup_date, pickup_window, address,
+            duration_months, item_count, monthly_subtotal, handling_fee, total,
+            status, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [b.row for b in bookings],
     )
+    conn.executemany(
+        "INSERT INTO booking_items (booking_id, item_type, item_name, s3_key) VALUES (?, ?, ?, ?)",
+        [item for b in bookings for item in b.items],
+    )
+    booking_stats.record_created_many(conn, [(b.status, b.total, b.created_at) for b in bookings])
+    log_events(
+        conn,
+        [("booking_submitted", b.booking_id, {"email": b.body["email"], "items": len(b.items)}) for b in bookings],
+    )
+    publish_business_events(
+        conn,
+        [
+            ("booking_submitted", b.booking_id, {"email": b.row[2], "item_count": len(b.items), "status": b.status})
+            for b in bookings
+        ],
+    )
+    return len(bookings)
 
 
-def publish_business_event(event_type: str, booking_id: str | None, payload: dict[str, Any]) -> None:
-    try:
-        PUBLISHER.publish(event_type=event_type, booking_id=booking_id, payload=payload)
-    except Exception as exc:  # noqa: BLE001
-        print(f"[messaging] publish failed for {event_type} booking={booking_id}: {exc}")
+@dataclass
+class Request:
+    """Transport-independent view of an HTTP request."""
 
+    method: str
+    target: str
+    headers: Message
+    body: bytes = b""
+    http_version: str = "HTTP/1.1"
 
-class Handler(BaseHTTPRequestHandler):
-    server_version = "HSSPlatform/2.0"
+
+@dataclass
+class Response:
+    """Transport-independent response: a complete ``body`` or a ``stream`` of chunks."""
+
+    status: int
+    headers: list[tuple[str, str]] = field(default_factory=list)
+    body: bytes = b""
+    stream: Iterable[bytes] | None = None
+    # Streams are coalesced into larger writes unless the chunks must reach the client as produced (SSE).
+    buffered: bool = True
+
+
+ROUTES = router.Router(
+    [
+        ("GET", "/health", "health"),
+        ("GET", "/metrics", "metrics"),
+        ("GET", "/api/v1/bookings", "list_bookings"),
+        ("POST", "/api/v1/bookings", "create_booking"),
+        ("POST", "/api/v1/bookings/batch", "create_bookings_batch"),
+        ("GET", "/api/v1/bookings/{booking_id}", "get_booking"),
+        ("POST", "/api/v1/bookings/{booking_id}/payment", "capture_payment"),
+        ("PATCH", "/api/v1/bookings/{booking_id}/status", "update_status"),
+        ("POST", "/api/v1/auth/login", "login"),
+        ("GET", "/api/v1/staff/queue", "staff_queue"),
+        ("POST", "/api/v1/staff/bookings/transitions", "bulk_transition"),
+        ("POST", "/api/v1/staff/bookings/{booking_id}/approve", "approve_booking"),
+        ("GET", "/api/v1/admin/bookings", "admin_bookings"),
+        ("GET", "/api/v1/admin/overview", "admin_overview"),
+        ("GET", "/api/v1/admin/exports/bookings", "export_bookings"),
+        ("GET", "/api/v1/admin/exports/audit", "export_audit"),
+        ("GET", "/api/v1/admin/outbox", "admin_outbox"),
+        ("GET", "/api/v1/admin/profiles", "list_profiles"),
+        ("GET", "/api/v1/admin/profiles/{profile_id}", "get_profile"),
+        ("GET", "/api/v1/audit", "list_audit_events"),
+        ("GET", "/api/v1/changes", "list_changes"),
+        ("GET", "/api/v1/changes/stream", "stream_changes"),
+        ("GET", "/api/v1/pickup-slots", "pickup_availability"),
+        ("PUT", "/api/v1/admin/pickup-slots", "set_pickup_capacity"),
+    ]
+)
+METRICS = metrics.RequestMetrics()
+PROFILER = tracing.Profiler()
+CACHE = cache.ResponseCache(
+    max_bytes=int(os.getenv("HSS_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("HSS_CACHE_TTL_SECONDS", "30")),
+)
+ADMISSION = admission.AdmissionControl(
+    {
+        "write": int(os.getenv("HSS_LIMIT_WRITE", "16")),
+        "admin": int(os.getenv("HSS_LIMIT_ADMIN", "4")),
+        "read": int(os.getenv("HSS_LIMIT_READ", "32")),
+    }
+)
+RETRY_AFTER_SECONDS = int(os.getenv("HSS_RETRY_AFTER_SECONDS", "1"))
+FEED = changefeed.ChangeFeed(
+    max_streams=int(os.getenv("HSS_FEED_MAX_STREAMS", "8")),
+    poll_seconds=float(os.getenv("HSS_FEED_POLL_SECONDS", "2")),
+    heartbeat_seconds=float(os.getenv("HSS_FEED_HEARTBEAT_SECONDS", "15")),
+    stream_seconds=float(os.getenv("HSS_FEED_STREAM_SECONDS", "300")),
+)
+
+
+def route_class(method: str, route: str) -> str:
+    """Admission class of a route label: ``health``, ``stream``, ``write``, ``admin`` or ``read``."""
+    if route in {"/health", "/metrics", "preflight", "unmatched"}:
+        return "health"
+    if route == "/api/v1/changes/stream":
+        return "stream"
+    if method not in {"GET", "HEAD"}:
+        return "write"
+    if route.startswith("/api/v1/admin/"):
+        return "admin"
+    return "read"
+
+
+def cors_headers() -> list[tuple[str, str]]:
+    return [
+        ("Access-Control-Allow-Origin", "*"),
+        (
+            "Access-Control-Allow-Headers",
+            "Content-Type,X-HSS-Role,X-Request-Id,X-HSS-Profile,If-None-Match,Last-Event-ID",
+        ),
+        ("Access-Control-Allow-Methods", "GET,POST,PATCH,PUT,OPTIONS"),
+        ("Access-Control-Expose-Headers", "ETag,X-Request-Id,X-HSS-Profile-Id,Server-Timing"),
+    ]
+
+
+# Headers a 304 repeats from the 200 it stands in for (RFC 9110 section 15.4.5), plus CORS and the request id.
+_NOT_MODIFIED_HEADERS = {
+    "vary",
+    "cache-control",
+    "x-request-id",
+    *(name.lower() for name, _ in cors_headers()),
+}
+
+
+def _header(headers: list[tuple[str, str]], name: str) -> str | None:
+    name = name.lower()
+    return next((value for key, value in headers if key.lower() == name), None)
+
+
+class ApiHandler:
+    """Route logic for one request, shared by every server engine.
+
+    Engines build a ``Request``, call ``dispatch()`` and write out the returned
+    ``Response``; nothing in here touches a socket.
+    """
+
+    def __init__(self, request: Request) -> None:
+        self.request = request
+        self.command = request.method
+        self.path = request.target
+        self.headers = request.headers
+        self.response = Response(500)
+        self._cached_request_id: str | None = None
+        # Bytes the ETag is computed from: the body minus anything per-request, such as ``request_id``.
+        self._etag_source: bytes | None = None
+
+    def dispatch(self) -> Response:
+        """Route the request and record per-route metrics around the handler."""
+        handler, params, route = self._resolve()
+        request_id = self._request_id()
+        with METRICS.track(self.command, route) as outcome, tracing.trace_request(
+            request_id, self.command, route
+        ) as trace:
+            profiled = False
+            kind = route_class(self.command, route)
+            release = ADMISSION.try_acquire(kind)
+            if release is None:
+                self._overloaded(kind)
+            else:
+                try:
+                    wanted = PROFILER.wanted(self._profile_requested())
+                    profiling = PROFILER.capture(trace) if wanted else nullcontext(False)
+                    with profiling as profiled:
+                        try:
+                            handler(**params)
+                        except Exception as exc:  # noqa: BLE001
+                            print(f"[api] unhandled error for {self.command} {self.path}: {exc!r}")
+                            self._error(500, "internal_error", "Unexpected server error")
+                finally:
+                    if self.response.stream is None:
+                        release()
+                    else:
+                        # A streamed body keeps working after dispatch returns, so it holds the slot until closed.
+                        self.response.stream = admission.ReleasingStream(iter(self.response.stream), release)
+            with tracing.span("encode"):
+                self._negotiate()
+            outcome["status"] = self.response.status
+            self.response.headers.append(("Server-Timing", trace.server_timing()))
+            if profiled:
+                self.response.headers.append(("X-HSS-Profile-Id", request_id))
+            tracing.log_if_slow(trace, self.response.status)
+        return self._finish()
+
+    def _finish(self) -> Response:
+        """Return the response; a HEAD request keeps the GET status and headers but never gets a body."""
+        response = self.response
+        if self.command == "HEAD":
+            close = getattr(response.stream, "close", None)
+            if close is not None:
+                close()
+            response.stream = None
+            response.body = b""
+        return response
+
+    def _negotiate(self) -> None:
+        """Attach an ETag, answer a matching ``If-None-Match`` with 304 and compress the body if accepted."""
+        response = self.response
+        content_type = _header(response.headers, "Content-Type") or ""
+        coding = None
+        if (
+            response.buffered
+            and negotiation.compressible(content_type)
+            and (response.stream is not None or len(response.body) >= COMPRESS_MIN_BYTES)
+        ):
+            response.headers.append(("Vary", "Accept-Encoding"))
+            coding = negotiation.choose_encoding(self.headers.get("Accept-Encoding"))
+        if self.command in {"GET", "HEAD"} and response.status == 200 and self._etag_source is not None:
+            etag = negotiation.etag_for(self._etag_source, coding)
+            if negotiation.if_none_match(self.headers.get("If-None-Match"), etag):
+                kept = [(name, value) for name, value in response.headers if name.lower() in _NOT_MODIFIED_HEADERS]
+                self.response = Response(HTTPStatus.NOT_MODIFIED, [*kept, ("ETag", etag)])
+                return
+            response.headers.append(("ETag", etag))
+        if coding is None:
+            return
+        response.headers.append(("Content-Encoding", coding))
+        if response.stream is not None:
+            response.stream = negotiation.CompressedStream(response.stream, coding)
+            return
+        response.body = negotiation.compress(response.body, coding)
+        response.headers = [
+            (name, str(len(response.body)) if name.lower() == "content-length" else value)
+            for name, value in response.headers
+        ]
+
+    def _overloaded(self, kind: str) -> None:
+        self._error(503, "overloaded", "Server is at capacity; retry shortly", [f"route_class={kind}"])
+        self.response.headers.append(("Retry-After", str(RETRY_AFTER_SECONDS)))
+
+    def shed(self) -> Response:
+        """503 response for a request the engine could not queue; the route handler never runs."""
+        ADMISSION.record_rejection("any", "queue_full")
+        self._overloaded("any")
+        return self._finish()
+
+    def reject(self, status: int, code: str, message: str) -> Response:
+        """Error response for a request the engine cannot serve; the route handler never runs."""
+        self._error(status, code, message)
+        return self._finish()
+
+    def _profile_requested(self) -> bool:
+        requested = self.headers.get("X-HSS-Profile", "").strip().lower() in {"1", "true", "yes"}
+        return requested and self._role() == "admin"
+
+    def _resolve(self) -> tuple[Callable[..., None], dict[str, Any], str]:
+        """Return ``(handler, path params, metrics route label)`` for this request."""
+        if self.command == "OPTIONS":
+            # CORS preflight is answered for every path, so it is not part of the route table.
+            return self._preflight, {}, "preflight"
+        try:
+            # HEAD is answered like GET; ``_finish`` drops the body.
+            match = ROUTES.match("GET" if self.command == "HEAD" else self.command, urlparse(self.path).path)
+        except router.MethodNotAllowed as exc:
+            return self._method_not_allowed, {"allowed": exc.allowed}, "unmatched"
+        if match is None:
+            return lambda: self._error(404, "not_found", "Resource not found"), {}, "unmatched"
+        return getattr(self, match.route.handler), match.params, match.route.pattern
+
+    def _preflight(self) -> None:
+        self.response = Response(HTTPStatus.NO_CONTENT, cors_headers())
+
+    def _method_not_allowed(self, allowed: list[str]) -> None:
+        self._error(405, "method_not_allowed", f"Method {self.command} is not supported for this resource")
+        if "GET" in allowed:
+            allowed = [*allowed, "HEAD"]
+        self.response.headers.append(("Allow", ", ".join(allowed)))
 
     def _request_id(self) -> str:
-        return self.headers.get("X-Request-Id", "").strip() or uuid4().hex[:12]
+        if self._cached_request_id is None:
+            self._cached_request_id = self.headers.get("X-Request-Id", "").strip() or uuid4().hex[:12]
+        return self._cached_request_id
 
     def _json(self, status: int, payload: dict[str, Any]) -> None:
-        body = json.dumps(payload).encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type,X-HSS-Role,X-Request-Id")
-        self.send_header("Access-Control-Allow-Methods", "GET,POST,PATCH,OPTIONS")
-        self.send_header("X-Request-Id", payload.get("request_id", self._request_id()))
-        self.end_headers()
-        self.wfile.write(body)
+        request_id = payload.get("request_id")
+        if request_id is None:
+            body = encode_json(payload)
+            self._json_body(status, body, self._request_id(), etag_source=body)
+            return
+        core = encode_json({key: value for key, value in payload.items() if key != "request_id"})
+        self._json_body(status, append_request_id(core, request_id), request_id, etag_source=core)
+
+    def _json_cached(self, status: int, body: bytes) -> None:
+        """Send a cached JSON object with this request's ``request_id`` appended as its last key."""
+        request_id = self._request_id()
+        self._json_body(status, append_request_id(body, request_id), request_id, etag_source=body)
+
+    def _json_report(self, status: int, payload: dict[str, Any], freshness: dict[str, str]) -> None:
+        """Send a report with its ``report_connection`` freshness fields and ``request_id`` appended.
+
+        Both are left out of the ETag: read live, ``data_as_of`` changes on every request.
+        """
+        self._json_report_body(status, encode_json(payload), freshness)
+
+    def _json_report_body(self, status: int, core: bytes, freshness: dict[str, str]) -> None:
+        """``_json_report`` for a report that is already encoded, such as a cached one."""
+        request_id = self._request_id()
+        self._json_body(status, append_fields(core, {**freshness, "request_id": request_id}), request_id, core)
+
+    def _json_body(self, status: int, body: bytes, request_id: str, etag_source: bytes | None = None) -> None:
+        self._etag_source = etag_source
+        self.response = Response(
+            status,
+            [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+                *cors_headers(),
+                ("X-Request-Id", request_id),
+            ],
+            body,
+        )
+
+    def _stream(
+        self,
+        status: int,
+        content_type: str,
+        chunks: Iterable[bytes],
+        filename: str | None = None,
+        buffered: bool = True,
+    ) -> None:
+        """Respond with ``chunks`` as they are produced; the engine decides how to frame them."""
+        headers = [("Content-Type", content_type)]
+        if filename:
+            headers.append(("Content-Disposition", f'attachment; filename="{filename}"'))
+        self.response = Response(
+            status,
+            [*headers, *cors_headers(), ("X-Request-Id", self._request_id())],
+            stream=chunks,
+            buffered=buffered,
+        )
+
+    def _raw(self, status: int, content_type: str, body: bytes, filename: str | None = None) -> None:
+        headers = [("Content-Type", content_type), ("Content-Length", str(len(body)))]
+        if filename:
+            headers.append(("Content-Disposition", f'attachment; filename="{filename}"'))
+        self._etag_source = body
+        self.response = Response(status, [*headers, *cors_headers(), ("X-Request-Id", self._request_id())], body)
 
     def _error(self, status: int, code: str, message: str, details: list[str] | None = None) -> None:
         payload: dict[str, Any] = {"error": {"code": code, "message": message}, "request_id": self._request_id()}
@@ -139,9 +730,28 @@ class Handler(BaseHTTPRequestHandler):
             payload["error"]["details"] = details
         self._json(status, payload)
 
+    def _query(self) -> dict[str, list[str]]:
+        return parse_qs(urlparse(self.path).query)
+
+    def _body(self) -> dict[str, Any] | None:
+        """Parsed JSON body, or ``None`` after answering 400 for a malformed one."""
+        try:
+            return self._read_json()
+        except ValueError as exc:
+            self._error(400, "validation_error", str(exc))
+            return None
+
+    def _write(self, job: writer.Job[T]) -> T | None:
+        """Run ``job`` on the single writer; ``None`` after answering the 404/409 it was rejected with."""
+        try:
+            with tracing.span("write"):
+                return WRITER.submit(job)
+        except writer.WriteRejected as exc:
+            self._error(exc.status, exc.code, exc.message)
+            return None
+
     def _read_json(self) -> dict[str, Any]:
-        length = int(self.headers.get("Content-Length", "0"))
-        raw = self.rfile.read(length) if length else b"{}"
+        raw = self.request.body
         if not raw:
             return {}
         try:
@@ -162,58 +772,65 @@ class Handler(BaseHTTPRequestHandler):
             return False
         return True
 
-    def _parse_pagination(self, parsed_query: dict[str, list[str]]) -> tuple[int, int]:
-        limit = parsed_query.get("limit", ["50"])[0]
+    def _parse_pagination(
+        self, parsed_query: dict[str, list[str]], default_limit: int = 50, max_limit: int = 200
+    ) -> tuple[int, int, str | None]:
+        """Return ``(limit, offset, cursor)``; a cursor, when present, takes precedence over offset."""
+        limit = parsed_query.get("limit", [str(default_limit)])[0]
         offset = parsed_query.get("offset", ["0"])[0]
+        cursor = parsed_query.get("cursor", [""])[0].strip() or None
         try:
-            limit_num = max(1, min(int(limit), 200))
+            limit_num = max(1, min(int(limit), max_limit))
             offset_num = max(0, int(offset))
         except ValueError as exc:
             raise ValueError("limit and offset must be integers") from exc
-        return limit_num, offset_num
+        return limit_num, offset_num, cursor
 
-    def do_OPTIONS(self) -> None:  # noqa: N802
-        self.send_response(HTTPStatus.NO_CONTENT)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type,X-HSS-Role,X-Request-Id")
-        self.send_header("Access-Control-Allow-Methods", "GET,POST,PATCH,OPTIONS")
-        self.end_headers()
+    def health(self) -> None:
+        self._json(200, {"status": "ok", "service": "hss-backend", "version": "2.0", "timestamp": utc_now()})
 
-    def do_GET(self) -> None:  # noqa: N802
-        parsed = urlparse(self.path)
-        path = parsed.path
-
-        if path == "/health":
-            self._json(200, {"status": "ok", "service": "hss-backend", "version": "2.0", "timestamp": utc_now()})
-            return
-
-        if path == "/api/v1/bookings":
-            params = parse_qs(parsed.query)
-            status_filter = params.get("status", [None])[0]
-            try:
-                limit, offset = self._parse_pagination(params)
-            except ValueError as exc:
-                self._error(400, "validation_error", str(exc))
-                return
+    def metrics(self) -> None:
+        self._raw(
+            200,
+            metrics.CONTENT_TYPE,
+            "".join(
+                (
+                    METRICS.render(),
+                    CACHE.render_metrics(),
+                    FEED.render_metrics(),
+                    WRITER.render_metrics(),
+                    ADMISSION.render_metrics(),
+                    SNAPSHOT.render_metrics() if SNAPSHOT is not None else "",
+                )
+            ).encode("utf-8"),
+        )
 
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.row_factory = sqlite3.Row
-                if status_filter:
-                    rows = conn.execute(
-                        "SELECT * FROM bookings WHERE status = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                        (status_filter, limit, offset),
-                    ).fetchall()
-                else:
-                    rows = conn.execute(
-                        "SELECT * FROM bookings ORDER BY created_at DESC LIMIT ? OFFSET ?", (limit, offset)
-                    ).fetchall()
-            self._json(200, {"bookings": [row_to_dict(r) for r in rows], "count": len(rows), "request_id": self._request_id()})
+    def list_bookings(self) -> None:
+        params = self._query()
+        status_filter = params.get("status", [None])[0]
+        try:
+            limit, offset, cursor = self._parse_pagination(params)
+            with POOL.connection() as conn:
+                rows, next_cursor = fetch_booking_page(conn, status_filter, limit, offset, cursor)
+        except ValueError as exc:
+            self._error(400, "validation_error", str(exc))
             return
+        self._json(
+            200,
+            {
+                "bookings": [row_to_dict(r) for r in rows],
+                "count": len(rows),
+                "next_cursor": next_cursor,
+                "request_id": self._request_id(),
+            },
+        )
 
-        if path.startswith("/api/v1/bookings/"):
-            booking_id = path.split("/")[-1]
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.row_factory = sqlite3.Row
+    def get_booking(self, booking_id: str) -> None:
+        key = ("booking", booking_id)
+        body = CACHE.get(key)
+        if body is None:
+            generation = CACHE.generation()
+            with POOL.connection() as conn:
                 booking = conn.execute("SELECT * FROM bookings WHERE id = ?", (booking_id,)).fetchone()
                 items = conn.execute(
                     "SELECT item_type, item_name, s3_key FROM booking_items WHERE booking_id = ?", (booking_id,)
@@ -223,248 +840,685 @@ class Handler(BaseHTTPRequestHandler):
                 return
             payload = row_to_dict(booking)
             payload["items"] = [row_to_dict(i) for i in items]
-            payload["request_id"] = self._request_id()
-            self._json(200, payload)
-            return
+            body = encode_json(payload)
+            CACHE.put(key, body, generation)
+        self._json_cached(200, body)
 
-        if path == "/api/v1/staff/queue":
-            if not self._require_role({"staff", "admin"}):
-                return
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.row_factory = sqlite3.Row
+    def staff_queue(self) -> None:
+        if not self._require_role({"staff", "admin"}):
+            return
+        key = ("staff_queue",)
+        body = CACHE.get(key)
+        if body is None:
+            generation = CACHE.generation()
+            with POOL.connection() as conn:
+                # Read the feed position first: events after it may repeat changes the snapshot already has,
+                # which clients tolerate, but none can be missed.
+                last_event_id = changefeed.latest_event_id(conn)
                 placeholders = ",".join("?" for _ in STAFF_VISIBLE_STATUSES)
                 rows = conn.execute(
                     f"SELECT * FROM bookings WHERE status IN ({placeholders}) ORDER BY created_at ASC",
                     STAFF_VISIBLE_STATUSES,
                 ).fetchall()
-            self._json(200, {"queue": [row_to_dict(r) for r in rows], "count": len(rows), "request_id": self._request_id()})
+            body = encode_json(
+                {"queue": [row_to_dict(r) for r in rows], "count": len(rows), "last_event_id": last_event_id}
+            )
+            CACHE.put(key, body, generation)
+        self._json_cached(200, body)
+
+    def admin_bookings(self) -> None:
+        if not self._require_role({"admin"}):
+            return
+        params = self._query()
+        status_filter = params.get("status", [None])[0]
+        try:
+            limit, offset, cursor = self._parse_pagination(params, default_limit=200, max_limit=1000)
+            with report_connection() as (conn, freshness):
+                last_event_id = changefeed.latest_event_id(conn)
+                rows, next_cursor = fetch_booking_page(conn, status_filter, limit, offset, cursor)
+        except ValueError as exc:
+            self._error(400, "validation_error", str(exc))
             return
+        self._json_report(
+            200,
+            {
+                "bookings": [row_to_dict(r) for r in rows],
+                "count": len(rows),
+                "next_cursor": next_cursor,
+                "last_event_id": last_event_id,
+            },
+            freshness,
+        )
 
-        if path == "/api/v1/admin/bookings":
-            if not self._require_role({"admin"}):
-                return
-            params = parse_qs(parsed.query)
-            status_filter = params.get("status", [None])[0]
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.row_factory = sqlite3.Row
-                if status_filter:
-                    rows = conn.execute(
-                        "SELECT * FROM bookings WHERE status = ? ORDER BY created_at DESC", (status_filter,)
-                    ).fetchall()
-                else:
-                    rows = conn.execute("SELECT * FROM bookings ORDER BY created_at DESC").fetchall()
-            self._json(200, {"bookings": [row_to_dict(r) for r in rows], "count": len(rows), "request_id": self._request_id()})
+    def admin_overview(self) -> None:
+        if not self._require_role({"admin"}):
+            return
+        params = self._query()
+        try:
+            days = max(1, min(int(params.get("days", ["30"])[0]), 366))
+        except ValueError:
+            self._error(400, "validation_error", "days must be an integer")
             return
+        key = ("overview", days)
+        body, freshness_body = CACHE.get(key), CACHE.get((*key, "freshness"))
+        if body is None or freshness_body is None:
+            generation = CACHE.generation()
+            with report_connection() as (conn, freshness):
+                overview = booking_stats.read_overview(conn, days)
+            # Freshness is cached beside the overview, not in it, so it stays out of the ETag.
+            body, freshness_body = encode_json(overview), encode_json(freshness)
+            CACHE.put(key, body, generation)
+            CACHE.put((*key, "freshness"), freshness_body, generation)
+        self._json_report_body(200, body, json.loads(freshness_body))
 
-        if path == "/api/v1/admin/overview":
-            if not self._require_role({"admin"}):
-                return
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.row_factory = sqlite3.Row
-                by_status = conn.execute(
-                    "SELECT status, COUNT(*) AS count FROM bookings GROUP BY status ORDER BY status"
-                ).fetchall()
-                totals = conn.execute(
-                    "SELECT COUNT(*) AS total_bookings, COALESCE(SUM(total), 0) AS gross_value, "
-                    "COALESCE(SUM(CASE WHEN status='paid' THEN total ELSE 0 END), 0) AS paid_revenue "
-                    "FROM bookings"
-                ).fetchone()
-            self._json(
-                200,
-                {
-                    "total_bookings": totals["total_bookings"],
-                    "gross_value": totals["gross_value"],
-                    "paid_revenue": totals["paid_revenue"],
-                    "status_breakdown": [row_to_dict(r) for r in by_status],
-                    "request_id": self._request_id(),
-                },
+    def export_bookings(self) -> None:
+        self._export("bookings")
+
+    def export_audit(self) -> None:
+        self._export("audit")
+
+    def _export(self, kind: str) -> None:
+        if not self._require_role({"admin"}):
+            return
+        params = self._query()
+        export_format = params.get("format", ["ndjson"])[0].lower()
+        if export_format not in exports.EXPORT_FORMATS:
+            self._error(400, "validation_error", f"format must be one of {sorted(exports.EXPORT_FORMATS)}")
+            return
+        try:
+            created_from, created_before = exports.parse_date_range(
+                params.get("from", [None])[0], params.get("to", [None])[0]
             )
+        except ValueError as exc:
+            self._error(400, "validation_error", str(exc))
             return
+        include_items = params.get("include_items", ["false"])[0].lower() in {"1", "true", "yes"}
 
-        if path == "/api/v1/audit":
-            if not self._require_role({"staff", "admin"}):
-                return
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.row_factory = sqlite3.Row
-                events = conn.execute("SELECT * FROM audit_events ORDER BY id DESC LIMIT 200").fetchall()
-            response = []
-            for event in events:
-                item = row_to_dict(event)
-                item["payload"] = json.loads(item["payload"])
-                response.append(item)
-            self._json(200, {"events": response, "request_id": self._request_id()})
+        def export_chunks() -> Iterator[bytes]:
+            # The generator owns its connection for as long as the engine keeps pulling chunks.
+            with POOL.connection() as conn:
+                if kind == "bookings":
+                    records = exports.iter_bookings(
+                        conn, params.get("status", [None])[0], created_from, created_before, include_items
+                    )
+                    columns = exports.BOOKING_COLUMNS
+                else:
+                    records = exports.iter_audit_events(
+                        conn,
+                        params.get("event_type", [None])[0],
+                        params.get("booking_id", [None])[0],
+                        created_from,
+                        created_before,
+                    )
+                    columns = exports.AUDIT_COLUMNS
+                if export_format == "csv":
+                    yield from exports.encode_csv(records, columns)
+                else:
+                    yield from exports.encode_ndjson(records)
+
+        self._stream(
+            200, exports.EXPORT_FORMATS[export_format], export_chunks(), filename=f"hss-{kind}.{export_format}"
+        )
+
+    def admin_outbox(self) -> None:
+        if not self._require_role({"admin"}):
             return
+        with POOL.connection() as conn:
+            status = outbox.outbox_status(conn)
+        self._json(200, {**status, "request_id": self._request_id()})
 
-        self._error(404, "not_found", "Resource not found")
+    def list_profiles(self) -> None:
+        if not self._require_role({"admin"}):
+            return
+        self._json(200, {"profiles": PROFILER.list(), "request_id": self._request_id()})
 
-    def do_POST(self) -> None:  # noqa: N802
-        path = urlparse(self.path).path
+    def get_profile(self, profile_id: str) -> None:
+        if not self._require_role({"admin"}):
+            return
+        capture = PROFILER.get(profile_id)
+        if capture is None:
+            self._error(404, "not_found", "Profile not found")
+            return
+        if self._query().get("format", ["pstats"])[0].lower() == "text":
+            self._raw(200, "text/plain; charset=utf-8", capture.summary().encode("utf-8"))
+        else:
+            self._raw(200, "application/octet-stream", capture.stats, filename=f"hss-{profile_id}.prof")
+
+    def list_audit_events(self) -> None:
+        if not self._require_role({"staff", "admin"}):
+            return
+        params = self._query()
+        event_type = params.get("event_type", [None])[0]
+        booking_id = params.get("booking_id", [None])[0]
         try:
-            body = self._read_json()
+            limit, offset, cursor = self._parse_pagination(params, default_limit=200, max_limit=500)
+            # Staff look up audit trails for bookings they just changed, so only admins read the snapshot.
+            with report_connection(use_snapshot=self._role() == "admin") as (conn, freshness):
+                events, next_cursor = fetch_audit_page(conn, event_type, booking_id, limit, offset, cursor)
         except ValueError as exc:
             self._error(400, "validation_error", str(exc))
             return
+        response = []
+        for event in events:
+            item = row_to_dict(event)
+            item["payload"] = json.loads(item["payload"])
+            response.append(item)
+        self._json_report(200, {"events": response, "next_cursor": next_cursor}, freshness)
 
-        if path == "/api/v1/auth/login":
-            email = (body.get("email") or "").strip().lower()
-            if not email:
-                self._error(400, "validation_error", "email is required")
-                return
-            if not EMAIL_RE.match(email):
-                self._error(400, "validation_error", "email is invalid")
-                return
-            role = infer_role(email, body.get("role"))
-            token = f"demo-{role}-{abs(hash(email)) % 1000000}"
-            self._json(200, {"token": token, "role": role, "expires_in": 3600, "request_id": self._request_id()})
+    def list_changes(self) -> None:
+        if not self._require_role({"staff", "admin"}):
+            return
+        params = self._query()
+        try:
+            since = self._feed_cursor(params.get("since", [None])[0])
+        except ValueError as exc:
+            self._error(400, "validation_error", str(exc))
             return
+        try:
+            limit = int(params.get("limit", [str(changefeed.DEFAULT_PAGE_SIZE)])[0])
+        except ValueError:
+            self._error(400, "validation_error", "limit must be an integer")
+            return
+        limit = max(1, min(limit, changefeed.MAX_PAGE_SIZE))
+        with POOL.connection() as conn:
+            if since is None:
+                events, last_event_id, has_more = [], changefeed.latest_event_id(conn), False
+            else:
+                events, last_event_id, has_more = changefeed.read_changes(conn, since, limit)
+        self._json(
+            200,
+            {
+                "events": events,
+                "count": len(events),
+                "last_event_id": last_event_id,
+                "has_more": has_more,
+                "request_id": self._request_id(),
+            },
+        )
 
-        if path == "/api/v1/bookings":
-            errors = validate_booking_payload(body)
-            if errors:
-                self._error(400, "validation_error", "Booking payload validation failed", errors)
-                return
+    def stream_changes(self) -> None:
+        if not self._require_role({"staff", "admin"}):
+            return
+        # EventSource sends Last-Event-ID on reconnect; it wins over the ``since`` the stream was first opened with.
+        raw_cursor = self.headers.get("Last-Event-ID") or self._query().get("since", [None])[0]
+        try:
+            since = self._feed_cursor(raw_cursor)
+        except ValueError as exc:
+            self._error(400, "validation_error", str(exc))
+            return
+        if since is None:
+            with POOL.connection() as conn:
+                since = changefeed.latest_event_id(conn)
+        stream = FEED.open_stream(POOL, since)
+        if stream is None:
+            ADMISSION.record_rejection("stream", "concurrency")
+            self._error(503, "overloaded", "Too many open change streams; poll /api/v1/changes?since= instead")
+            self.response.headers.append(("Retry-After", str(max(1, int(FEED.poll_seconds)))))
+            return
+        self._stream(200, changefeed.CONTENT_TYPE, stream, buffered=False)
+        self.response.headers.append(("Cache-Control", "no-cache"))
 
-            booking_id = f"HSS-{int(datetime.now().timestamp())}"
-            now = utc_now()
-            status = "submitted"
-            pricing = body["pricing"]
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.execute(
-                    """
-                    INSERT INTO bookings (
-                        id, customer_name, email, pickup_date, pickup_window, address,
-                        duration_months, item_count, monthly_subtotal, handling_fee, total,
-                        status, created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        booking_id,
-                        body["customer_name"].strip(),
-                        body["email"].strip().lower(),
-                        body["pickup_date"],
-                        body["pickup_window"],
-                        body["address"].strip(),
-                        int(pricing["duration"]),
-                        len(body["items"]),
-                        float(pricing["monthlySubtotal"]),
-                        float(pricing["handlingFee"]),
-                        float(pricing["total"]),
-                        status,
-                        now,
-                        now,
-                    ),
-                )
-                for item in body["items"]:
-                    conn.execute(
-                        "INSERT INTO booking_items (booking_id, item_type, item_name, s3_key) VALUES (?, ?, ?, ?)",
-                        (booking_id, item["type"], item.get("name", "").strip(), item.get("s3Key", "")),
-                    )
-                log_event(conn, "booking_submitted", booking_id, {"email": body["email"], "items": len(body["items"])})
-            publish_business_event(
-                "booking_submitted",
-                booking_id,
-                {"email": body["email"].strip().lower(), "item_count": len(body["items"]), "status": status},
+    @staticmethod
+    def _feed_cursor(raw: str | None) -> int | None:
+        """Parse a change-feed cursor; ``None`` means "start from now"."""
+        if raw is None or not raw.strip():
+            return None
+        try:
+            cursor = int(raw)
+        except ValueError as exc:
+            raise ValueError("since must be a non-negative integer event id") from exc
+        if cursor < 0:
+            raise ValueError("since must be a non-negative integer event id")
+        return cursor
+
+    def pickup_availability(self) -> None:
+        params = self._query()
+        try:
+            start = parse_date(params.get("from", [date.today().isoformat()])[0])
+            end = parse_date(params["to"][0]) if "to" in params else start + timedelta(days=13)
+        except ValueError:
+            self._error(400, "validation_error", "from and to must be dates in YYYY-MM-DD format")
+            return
+        if end < start or (end - start).days >= MAX_AVAILABILITY_DAYS:
+            self._error(
+                400, "validation_error", f"to must be on or after from, at most {MAX_AVAILABILITY_DAYS} days later"
             )
-            self._json(201, {"booking_id": booking_id, "status": status, "request_id": self._request_id()})
             return
+        key = ("pickup_slots", start, end)
+        body = CACHE.get(key)
+        if body is None:
+            generation = CACHE.generation()
+            with POOL.connection() as conn:
+                slots = pickup_slots.availability(conn, start, end, SLOT_CAPACITY)
+            body = encode_json({"from": start.isoformat(), "to": end.isoformat(), "slots": slots})
+            CACHE.put(key, body, generation)
+        self._json_cached(200, body)
 
-        if path.endswith("/payment") and path.startswith("/api/v1/bookings/"):
-            booking_id = path.split("/")[-2]
-            method = str(body.get("method") or "card").strip().lower()
-            if method not in ALLOWED_PAYMENT_METHODS:
-                self._error(400, "validation_error", "Unsupported payment method")
-                return
-            with sqlite3.connect(DB_PATH) as conn:
-                row = conn.execute("SELECT status FROM bookings WHERE id = ?", (booking_id,)).fetchone()
-                if not row:
-                    self._error(404, "not_found", "Booking not found")
-                    return
-                if row[0] != "approved":
-                    self._error(409, "conflict", "Booking must be approved before payment")
-                    return
-                payment_reference = f"PAY-{int(datetime.now().timestamp())}"
-                conn.execute(
-                    "UPDATE bookings SET status = ?, payment_reference = ?, updated_at = ? WHERE id = ?",
-                    ("paid", payment_reference, utc_now(), booking_id),
-                )
-                log_event(conn, "payment_captured", booking_id, {"method": method, "payment_reference": payment_reference})
+    def set_pickup_capacity(self) -> None:
+        body = self._body()
+        if body is None:
+            return
+        if not self._require_role({"admin"}):
+            return
+        window = body.get("pickup_window")
+        capacity = body.get("capacity")
+        errors = []
+        try:
+            pickup_date = parse_date(body.get("pickup_date")).isoformat()
+        except ValueError:
+            errors.append("pickup_date must be a date in YYYY-MM-DD format")
+        if window not in pickup_slots.PICKUP_WINDOWS:
+            errors.append(f"pickup_window must be one of {list(pickup_slots.PICKUP_WINDOWS)}")
+        if capacity is not None and (isinstance(capacity, bool) or not isinstance(capacity, int) or capacity < 0):
+            errors.append("capacity must be a non-negative integer, or null for the default")
+        if errors:
+            self._error(400, "validation_error", "Pickup slot update failed validation", errors)
+            return
+
+        def update(conn: sqlite3.Connection) -> dict[str, Any]:
+            pickup_slots.set_capacity(conn, pickup_date, window, capacity)
+            day = date.fromisoformat(pickup_date)
+            slots = pickup_slots.availability(conn, day, day, SLOT_CAPACITY)
+            return next(slot for slot in slots if slot["pickup_window"] == window)
+
+        slot = self._write(update)
+        if slot is None:
+            return
+        CACHE.invalidate(namespaces=("pickup_slots",))
+        self._json(200, {"slot": slot, "request_id": self._request_id()})
+
+    def login(self) -> None:
+        body = self._body()
+        if body is None:
+            return
+        email = (body.get("email") or "").strip().lower()
+        if not email:
+            self._error(400, "validation_error", "email is required")
+            return
+        if not EMAIL_RE.match(email):
+            self._error(400, "validation_error", "email is invalid")
+            return
+        role = infer_role(email, body.get("role"))
+        token = f"demo-{role}-{abs(hash(email)) % 1000000}"
+        self._json(200, {"token": token, "role": role, "expires_in": 3600, "request_id": self._request_id()})
+
+    def create_booking(self) -> None:
+        body = self._body()
+        if body is None:
+            return
+        with tracing.span("validate"):
+            errors = validate_booking_payload(body)
+        if errors:
+            self._error(400, "validation_error", "Booking payload validation failed", errors)
+            return
+
+        new_booking = NewBooking.from_payload(ids.new_booking_id(), body, utc_now())
+        status = new_booking.status
+
+        def create(conn: sqlite3.Connection) -> int:
+            if reserve_pickup_slots(conn, [new_booking]):
+                raise writer.WriteRejected(409, "slot_full", slot_full_message(new_booking))
+            return insert_bookings(conn, [new_booking])
+
+        if self._write(create) is None:
+            return
+        invalidate_booking_views()
+        self._json(201, {"booking_id": new_booking.booking_id, "status": status, "request_id": self._request_id()})
+
+    def create_bookings_batch(self) -> None:
+        body = self._body()
+        if body is None:
+            return
+        entries = body.get("bookings")
+        mode = str(body.get("mode") or "partial").lower()
+        if not isinstance(entries, list) or not entries:
+            self._error(400, "validation_error", "bookings must be a non-empty array")
+            return
+        if len(entries) > MAX_BATCH_BOOKINGS:
+            self._error(400, "validation_error", f"bookings may contain at most {MAX_BATCH_BOOKINGS} entries")
+            return
+        if mode not in {"partial", "atomic"}:
+            self._error(400, "validation_error", "mode must be one of ['atomic', 'partial']")
+            return
+
+        now = utc_now()
+        results: list[dict[str, Any]] = []
+        accepted: list[NewBooking] = []
+        with tracing.span("validate"):
+            for index, entry in enumerate(entries):
+                errors = validate_booking_payload(entry) if isinstance(entry, dict) else ["entry must be an object"]
+                if not errors:
+                    try:
+                        new_booking = NewBooking.from_payload(ids.new_booking_id(), entry, now)
+                    except (TypeError, ValueError, AttributeError, KeyError):
+                        errors = ["pricing values must be numbers and item fields must be strings"]
+                if errors:
+                    results.append({"index": index, "errors": errors})
+                    continue
+                accepted.append(new_booking)
+                results.append({"index": index, "booking_id": new_booking.booking_id, "status": new_booking.status})
+
+        failed = len(entries) - len(accepted)
+        if failed and (mode == "atomic" or not accepted):
+            details = [f"bookings[{r['index']}]: {error}" for r in results if "errors" in r for error in r["errors"]]
+            self._error(400, "validation_error", "Batch booking validation failed; nothing was created", details)
+            return
+
+        def create(conn: sqlite3.Connection) -> list[NewBooking]:
+            full = reserve_pickup_slots(conn, accepted)
+            if full and (mode == "atomic" or len(full) == len(accepted)):
+                raise writer.WriteRejected(409, "slot_full", f"{slot_full_message(full[0])}; nothing was created")
+            insert_bookings(conn, [b for b in accepted if b not in full])
+            return full
+
+        full = self._write(create)
+        if full is None:
+            return
+        if full:
+            rejected = {b.booking_id: b for b in full}
+            for position, result in enumerate(results):
+                booking = rejected.get(result.get("booking_id", ""))
+                if booking is not None:
+                    results[position] = {"index": result["index"], "errors": [slot_full_message(booking)]}
+            failed += len(full)
+        invalidate_booking_views()
+        self._json(
+            201 if not failed else 207,
+            {
+                "mode": mode,
+                "created": len(accepted) - len(full),
+                "failed": failed,
+                "results": results,
+                "request_id": self._request_id(),
+            },
+        )
+
+    def capture_payment(self, booking_id: str) -> None:
+        body = self._body()
+        if body is None:
+            return
+        method = str(body.get("method") or "card").strip().lower()
+        if method not in ALLOWED_PAYMENT_METHODS:
+            self._error(400, "validation_error", "Unsupported payment method")
+            return
+
+        def capture(conn: sqlite3.Connection) -> str:
+            row = conn.execute("SELECT status, total FROM bookings WHERE id = ?", (booking_id,)).fetchone()
+            if not row:
+                raise writer.WriteRejected(404, "not_found", "Booking not found")
+            if row[0] != "approved":
+                raise writer.WriteRejected(409, "conflict", "Booking must be approved before payment")
+            payment_reference = ids.new_payment_reference()
+            now = utc_now()
+            conn.execute(
+                "UPDATE bookings SET status = ?, payment_reference = ?, updated_at = ? WHERE id = ?",
+                ("paid", payment_reference, now, booking_id),
+            )
+            booking_stats.record_status_change(conn, row[0], "paid", row[1], now)
+            log_event(conn, "payment_captured", booking_id, {"method": method, "payment_reference": payment_reference})
             publish_business_event(
+                conn,
                 "payment_captured",
                 booking_id,
                 {"method": method, "payment_reference": payment_reference, "status": "paid"},
             )
-            self._json(
-                200,
-                {
-                    "booking_id": booking_id,
-                    "payment_reference": payment_reference,
-                    "status": "paid",
-                    "request_id": self._request_id(),
-                },
+            return payment_reference
+
+        payment_reference = self._write(capture)
+        if payment_reference is None:
+            return
+        invalidate_booking_views([booking_id])
+        self._json(
+            200,
+            {
+                "booking_id": booking_id,
+                "payment_reference": payment_reference,
+                "status": "paid",
+                "request_id": self._request_id(),
+            },
+        )
+
+    def bulk_transition(self) -> None:
+        body = self._body()
+        if body is None:
+            return
+        if not self._require_role({"staff", "admin"}):
+            return
+        raw_ids = body.get("booking_ids")
+        new_status = body.get("status")
+        if not isinstance(raw_ids, list) or not raw_ids or not all(isinstance(i, str) for i in raw_ids):
+            self._error(400, "validation_error", "booking_ids must be a non-empty array of strings")
+            return
+        booking_ids = list(dict.fromkeys(raw_ids))
+        if len(booking_ids) > MAX_BULK_TRANSITIONS:
+            self._error(400, "validation_error", f"booking_ids may contain at most {MAX_BULK_TRANSITIONS} entries")
+            return
+        if not isinstance(new_status, str) or new_status not in ALLOWED_STATUSES:
+            self._error(400, "validation_error", f"status must be one of {sorted(ALLOWED_STATUSES)}")
+            return
+
+        actor = self._role()
+        results = self._write(lambda conn: apply_bulk_transition(conn, booking_ids, new_status, actor))
+        if results is None:
+            return
+        invalidate_booking_views(r["booking_id"] for r in results if r["outcome"] == "updated")
+        counts: dict[str, int] = {}
+        for result in results:
+            counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+        self._json(
+            200,
+            {"status": new_status, "counts": counts, "results": results, "request_id": self._request_id()},
+        )
+
+    def approve_booking(self, booking_id: str) -> None:
+        body = self._body()
+        if body is None:
+            return
+        if not self._require_role({"staff", "admin"}):
+            return
+        actor = self._role()
+
+        def approve(conn: sqlite3.Connection) -> bool:
+            found = conn.execute("SELECT id, status, total FROM bookings WHERE id = ?", (booking_id,)).fetchone()
+            if not found:
+                raise writer.WriteRejected(404, "not_found", "Booking not found")
+            if found[1] not in {"submitted", "approved"}:
+                raise writer.WriteRejected(409, "conflict", "Only submitted bookings can be approved")
+            now = utc_now()
+            conn.execute(
+                "UPDATE bookings SET status = ?, updated_at = ? WHERE id = ?",
+                ("approved", now, booking_id),
             )
+            booking_stats.record_status_change(conn, found[1], "approved", found[2], now)
+            log_event(conn, "staff_booking_approved", booking_id, {"status": "approved", "actor_role": actor})
+            publish_business_event(conn, "staff_booking_approved", booking_id, {"status": "approved", "actor_role": actor})
+            return True
+
+        if self._write(approve) is None:
             return
+        invalidate_booking_views([booking_id])
+        self._json(200, {"booking_id": booking_id, "status": "approved", "request_id": self._request_id()})
 
-        if path.endswith("/approve") and path.startswith("/api/v1/staff/bookings/"):
-            if not self._require_role({"staff", "admin"}):
-                return
-            booking_id = path.split("/")[-2]
-            with sqlite3.connect(DB_PATH) as conn:
-                found = conn.execute("SELECT id, status FROM bookings WHERE id = ?", (booking_id,)).fetchone()
-                if not found:
-                    self._error(404, "not_found", "Booking not found")
-                    return
-                if found[1] not in {"submitted", "approved"}:
-                    self._error(409, "conflict", "Only submitted bookings can be approved")
-                    return
-                conn.execute(
-                    "UPDATE bookings SET status = ?, updated_at = ? WHERE id = ?",
-                    ("approved", utc_now(), booking_id),
-                )
-                actor = self._role()
-                log_event(conn, "staff_booking_approved", booking_id, {"status": "approved", "actor_role": actor})
-            publish_business_event("staff_booking_approved", booking_id, {"status": "approved", "actor_role": self._role()})
-            self._json(200, {"booking_id": booking_id, "status": "approved", "request_id": self._request_id()})
+    def update_status(self, booking_id: str) -> None:
+        body = self._body()
+        if body is None:
+            return
+        new_status = body.get("status")
+        if not isinstance(new_status, str) or new_status not in ALLOWED_STATUSES:
+            self._error(400, "validation_error", f"status must be one of {sorted(ALLOWED_STATUSES)}")
             return
 
-        self._error(404, "not_found", "Resource not found")
+        def transition(conn: sqlite3.Connection) -> bool:
+            """Apply the change; ``False`` when the booking already has ``new_status``."""
+            current = conn.execute(
+                "SELECT status, total, pickup_date, pickup_window FROM bookings WHERE id = ?", (booking_id,)
+            ).fetchone()
+            if not current:
+                raise writer.WriteRejected(404, "not_found", "Booking not found")
+            old_status = current[0]
+            if new_status == old_status:
+                return False
+            if new_status not in STATUS_TRANSITIONS.get(old_status, set()):
+                raise writer.WriteRejected(409, "conflict", f"Invalid status transition: {old_status} -> {new_status}")
+            now = utc_now()
+            conn.execute(
+                "UPDATE bookings SET status = ?, updated_at = ? WHERE id = ?",
+                (new_status, now, booking_id),
+            )
+            if new_status in pickup_slots.RELEASED_STATUSES:
+                pickup_slots.release(conn, [(current[2], current[3])])
+            booking_stats.record_status_change(conn, old_status, new_status, current[1], now)
+            log_event(conn, "status_updated", booking_id, {"from": old_status, "to": new_status})
+            publish_business_event(conn, "status_updated", booking_id, {"from": old_status, "to": new_status})
+            return True
 
-    def do_PATCH(self) -> None:  # noqa: N802
-        path = urlparse(self.path).path
-        try:
-            body = self._read_json()
-        except ValueError as exc:
-            self._error(400, "validation_error", str(exc))
+        changed = self._write(transition)
+        if changed is None:
             return
+        if changed:
+            invalidate_booking_views([booking_id])
+        self._json(200, {"booking_id": booking_id, "status": new_status, "request_id": self._request_id()})
 
-        if path.endswith("/status") and path.startswith("/api/v1/bookings/"):
-            booking_id = path.split("/")[-2]
-            new_status = body.get("status")
-            if new_status not in ALLOWED_STATUSES:
-                self._error(400, "validation_error", f"status must be one of {sorted(ALLOWED_STATUSES)}")
-                return
 
-            with sqlite3.connect(DB_PATH) as conn:
-                current = conn.execute("SELECT status FROM bookings WHERE id = ?", (booking_id,)).fetchone()
-                if not current:
-                    self._error(404, "not_found", "Booking not found")
-                    return
-                old_status = current[0]
-                if new_status == old_status:
-                    self._json(200, {"booking_id": booking_id, "status": new_status, "request_id": self._request_id()})
-                    return
-                if new_status not in STATUS_TRANSITIONS.get(old_status, set()):
-                    self._error(409, "conflict", f"Invalid status transition: {old_status} -> {new_status}")
-                    return
-                conn.execute(
-                    "UPDATE bookings SET status = ?, updated_at = ? WHERE id = ?",
-                    (new_status, utc_now(), booking_id),
-                )
-                log_event(conn, "status_updated", booking_id, {"from": old_status, "to": new_status})
-            publish_business_event("status_updated", booking_id, {"from": old_status, "to": new_status})
-            self._json(200, {"booking_id": booking_id, "status": new_status, "request_id": self._request_id()})
+class Handler(BaseHTTPRequestHandler):
+    """``http.server`` adapter around ``ApiHandler`` for the threaded engine."""
+
+    server_version = "HSSPlatform/2.0"
+    # Socket timeout so a stalled client cannot hold one of the bounded workers indefinitely.
+    timeout = float(os.getenv("HSS_SOCKET_TIMEOUT", "30")) or None
+
+    def _handle(self) -> None:
+        self._write_response(self._api_handler().dispatch())
+
+    def _api_handler(self) -> ApiHandler:
+        length = int(self.headers.get("Content-Length", "0") or 0)
+        body = self.rfile.read(length) if length > 0 else b""
+        return ApiHandler(Request(self.command, self.path, self.headers, body, self.request_version))
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_PUT = do_DELETE = do_OPTIONS = _handle  # noqa: N815
+
+    def _write_response(self, response: Response) -> None:
+        if response.stream is None:
+            self.send_response(response.status)
+            for name, value in response.headers:
+                self.send_header(name, value)
+            self.end_headers()
+            if response.body:
+                self.wfile.write(response.body)
             return
 
-        self._error(404, "not_found", "Resource not found")
+        # Streams use chunked encoding for HTTP/1.1 clients and a close-delimited body for HTTP/1.0.
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            self.protocol_version = "HTTP/1.1"
+        self.send_response(response.status)
+        for name, value in response.headers:
+            self.send_header(name, value)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            chunks = coalesce_chunks(response.stream) if response.buffered else response.stream
+            for data in chunks:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data) if chunked else data)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.log_message("client disconnected during streamed response to %s", self.path)
+        finally:
+            close = getattr(response.stream, "close", None)
+            if close is not None:
+                close()
+
+
+class OverloadHandler(Handler):
+    """Answers 503 without routing; used for connections the worker queue has no room for."""
+
+    timeout = admission.REJECT_READ_TIMEOUT
+
+    def _handle(self) -> None:
+        self._write_response(self._api_handler().shed())
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_PUT = do_DELETE = do_OPTIONS = _handle  # noqa: N815
+
+
+def coalesce_chunks(chunks: Iterable[bytes], flush_bytes: int = STREAM_FLUSH_BYTES) -> Iterator[bytes]:
+    """Merge small chunks so each socket write carries at least ``flush_bytes``."""
+    buffered = bytearray()
+    for chunk in chunks:
+        buffered += chunk
+        if len(buffered) >= flush_bytes:
+            yield bytes(buffered)
+            buffered.clear()
+    if buffered:
+        yield bytes(buffered)
+
+
+def apply_bulk_transition(
+    conn: sqlite3.Connection, booking_ids: list[str], new_status: str, actor: str
+) -> list[dict[str, Any]]:
+    """Move every eligible booking to ``new_status`` in one transaction.
+
+    Each booking is checked against ``STATUS_TRANSITIONS``. Returns one outcome per
+    ID, in request order: ``updated``, ``unchanged``, ``conflict`` or ``not_found``.
+    Runs as a ``WRITER`` job, whose transaction already holds the write lock, so
+    no other writer can change a status between the check and the update.
+    """
+    placeholders = ",".join("?" for _ in booking_ids)
+    current = {
+        row["id"]: row
+        for row in conn.execute(
+            f"SELECT id, status, total, pickup_date, pickup_window FROM bookings WHERE id IN ({placeholders})",
+            booking_ids,
+        )
+    }
+    results: list[dict[str, Any]] = []
+    updates: list[tuple[str, str, str]] = []
+    for booking_id in booking_ids:
+        row = current.get(booking_id)
+        if row is None:
+            results.append({"booking_id": booking_id, "outcome": "not_found"})
+        elif row["status"] == new_status:
+            results.append({"booking_id": booking_id, "outcome": "unchanged", "status": new_status})
+        elif new_status not in STATUS_TRANSITIONS.get(row["status"], set()):
+            results.append(
+                {
+                    "booking_id": booking_id,
+                    "outcome": "conflict",
+                    "status": row["status"],
+                    "message": f"Invalid status transition: {row['status']} -> {new_status}",
+                }
+            )
+        else:
+            results.append({"booking_id": booking_id, "outcome": "updated", "from": row["status"], "status": new_status})
+            updates.append((booking_id, row["status"], row["total"]))
+    if not updates:
+        return results
+
+    now = utc_now()
+    conn.executemany(
+        "UPDATE bookings SET status = ?, updated_at = ? WHERE id = ?",
+        [(new_status, now, booking_id) for booking_id, _, _ in updates],
+    )
+    booking_stats.record_status_changes(conn, [(old, new_status, total) for _, old, total in updates], now)
+    if new_status in pickup_slots.RELEASED_STATUSES:
+        released = [current[booking_id] for booking_id, _, _ in updates]
+        pickup_slots.release(conn, [(row["pickup_date"], row["pickup_window"]) for row in released])
+    if new_status == "approved":
+        events = [
+            ("staff_booking_approved", booking_id, {"status": "approved", "actor_role": actor})
+            for booking_id, _, _ in updates
+        ]
+    else:
+        events = [
+            ("status_updated", booking_id, {"from": old, "to": new_status, "actor_role": actor})
+            for booking_id, old, _ in updates
+        ]
+    log_events(conn, events)
+    publish_business_events(conn, events)
+    return results
 
 
 def validate_booking_payload(payload: dict[str, Any]) -> list[str]:
@@ -473,6 +1527,9 @@ def validate_booking_payload(payload: dict[str, Any]) -> list[str]:
     for field in required:
         if field not in payload:
             errors.append(f"{field} is required")
+    for field in ["customer_name", "email", "address"]:
+        if field in payload and not isinstance(payload[field], str):
+            errors.append(f"{field} must be a string")
 
     customer_name = str(payload.get("customer_name", "")).strip()
     if customer_name and len(customer_name) < 2:
@@ -482,6 +1539,14 @@ def validate_booking_payload(payload: dict[str, Any]) -> list[str]:
     if email and not EMAIL_RE.match(email):
         errors.append("email is invalid")
 
+    if "pickup_date" in payload:
+        try:
+            parse_date(payload["pickup_date"])
+        except ValueError:
+            errors.append("pickup_date must be a date in YYYY-MM-DD format")
+    if "pickup_window" in payload and payload["pickup_window"] not in pickup_slots.PICKUP_WINDOWS:
+        errors.append(f"pickup_window must be one of {list(pickup_slots.PICKUP_WINDOWS)}")
+
     if "items" in payload:
         items = payload["items"]
         if not isinstance(items, list) or len(items) < 1:
@@ -495,27 +1560,146 @@ def validate_booking_payload(payload: dict[str, Any]) -> list[str]:
                 item_type = item.get("type")
                 if item_type not in valid_item_types:
                     errors.append(f"items[{idx}].type must be one of {sorted(valid_item_types)}")
+                for field in ["name", "s3Key"]:
+                    if item.get(field) is not None and not isinstance(item[field], str):
+                        errors.append(f"items[{idx}].{field} must be a string")
 
     pricing = payload.get("pricing", {})
-    if pricing:
+    if not isinstance(pricing, dict):
+        errors.append("pricing must be an object")
+    elif "pricing" in payload:
         for field in ["duration", "monthlySubtotal", "handlingFee", "total"]:
             if field not in pricing:
                 errors.append(f"pricing.{field} is required")
+        duration = pricing.get("duration", 0)
         try:
-            if int(pricing.get("duration", 0)) < 1:
-                errors.append("pricing.duration must be >= 1")
-        except (TypeError, ValueError):
+            # bool is an int subclass, and float() admits NaN and infinities; none of them is a duration.
+            if isinstance(duration, bool) or not math.isfinite(float(duration)):
+                raise ValueError(duration)
+            months = int(duration)
+        except (TypeError, ValueError, OverflowError):
             errors.append("pricing.duration must be a number")
+        else:
+            if months < 1:
+                errors.append("pricing.duration must be >= 1")
+            elif months > MAX_PRICING_DURATION:
+                errors.append(f"pricing.duration must be <= {MAX_PRICING_DURATION}")
+        for field in ["monthlySubtotal", "handlingFee", "total"]:
+            value = pricing.get(field, 0)
+            try:
+                if isinstance(value, bool) or not math.isfinite(float(value)):
+                    raise ValueError(value)
+            except (TypeError, ValueError, OverflowError):
+                errors.append(f"pricing.{field} must be a number")
+                continue
+            if abs(float(value)) > MAX_PRICING_AMOUNT:
+                errors.append(f"pricing.{field} must be at most {MAX_PRICING_AMOUNT} in magnitude")
 
     return errors
 
 
-def run(port: int = 8081) -> None:
+SERVER_ENGINES = ("threaded", "asyncio")
+
+
+def start_runtime() -> None:
+    """Start the background threads of the current runtime: writer, outbox dispatcher and snapshot refresher."""
+    WRITER.start()
+    DISPATCHER.start()
+    if SNAPSHOT is not None:
+        SNAPSHOT.start()
+
+
+def startup() -> None:
     init_db()
-    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    start_runtime()
+
+
+def shutdown() -> None:
+    FEED.close()
+    WRITER.stop()
+    DISPATCHER.stop()
+    if SNAPSHOT is not None:
+        SNAPSHOT.stop()
+    close_publisher = getattr(PUBLISHER, "close", None)
+    if close_publisher is not None:
+        close_publisher()
+    POOL.close()
+
+
+def reset_runtime() -> None:
+    """Replace the pool, publisher, dispatcher, writer and snapshot, e.g. in a freshly forked worker.
+
+    SQLite connections, boto3 clients and background threads must not be shared
+    across ``fork``; each worker process builds its own.
+    """
+    global POOL, PUBLISHER, DISPATCHER, WRITER, SNAPSHOT
+    POOL = build_pool()
+    PUBLISHER = build_publisher()
+    DISPATCHER = build_dispatcher(POOL, PUBLISHER)
+    WRITER = build_writer(POOL)
+    SNAPSHOT = build_snapshot()
+
+
+def serve_engine(engine: str, port: int, sock: socket.socket | None = None) -> None:
+    """Serve until stopped with an already started runtime, optionally on a pre-bound listening socket."""
+    if engine == "asyncio":
+        import asyncio
+
+        import aio_server
+
+        asyncio.run(aio_server.serve(port, sock=sock))
+        return
+    server = admission.BoundedThreadingHTTPServer(
+        ("0.0.0.0", port),
+        Handler,
+        OverloadHandler,
+        workers=int(os.getenv("HSS_HTTP_WORKERS", "64")),
+        queue_depth=int(os.getenv("HSS_HTTP_QUEUE_DEPTH", "128")),
+        admission=ADMISSION,
+        bind_and_activate=sock is None,
+    )
+    if sock is not None:
+        server.socket.close()
+        server.socket = sock
+        server.server_address = sock.getsockname()
     print(f"HSS backend API listening on http://0.0.0.0:{port}")
-    server.serve_forever()
+    try:
+        server.serve_forever()
+    finally:
+        # End change-feed streams first; otherwise each one holds a worker for the whole grace period.
+        FEED.close()
+        server.server_close()
+
+
+def run(port: int = 8081, engine: str | None = None, workers: int | None = None) -> None:
+    engine = (engine or os.getenv("HSS_SERVER_ENGINE", "threaded")).strip().lower()
+    if engine not in SERVER_ENGINES:
+        raise ValueError(f"engine must be one of {SERVER_ENGINES}, got {engine!r}")
+    if workers is None:
+        workers = int(os.getenv("HSS_WORKERS", "1"))
+    if workers != 1:
+        import prefork
+
+        prefork.Supervisor(port, engine, workers or os.cpu_count() or 1).run()
+        return
+    startup()
+    try:
+        serve_engine(engine, port)
+    finally:
+        shutdown()
 
 
 if __name__ == "__main__":
-    run()
+    import argparse
+    import sys
+
+    # Let engine modules that ``import server`` share this module's pool and dispatcher.
+    sys.modules.setdefault("server", sys.modules[__name__])
+    parser = argparse.ArgumentParser(description="Run the HSS backend API.")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--engine", choices=SERVER_ENGINES, default=None, help="defaults to $HSS_SERVER_ENGINE or threaded")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes; 0 means one per CPU (defaults to $HSS_WORKERS or 1)"
+    )
+    args = parser.parse_args()
+    run(args.port, args.engine, args.workers)
@@ -0,0 +1,230 @@
+"""Read-only analytics snapshot of the live database, for admin reporting.
+
+Long report queries against the live file hold WAL read transactions while
+customer writes are committing; the writes stay correct, but checkpoints stall
+and report latency follows write load. ``AnalyticsSnapshot`` copies the live
+database to a separate file with SQLite's online backup API, on a timer or
+after a number of committed writes, and serves reports from that copy.
+
+* The backup runs in one step, which is a single read transaction on the
+  source. Under WAL that never blocks writers.
+* The copy is built in a temporary file and swapped in with ``os.replace``,
+  so readers never see a half-written snapshot. Connections already reading
+  the previous file keep it until they finish.
+* Snapshot files never change once published, so they are opened read-only
+  with ``immutable=1``: no locks, no journal lookups.
+* ``snapshot_meta.taken_at`` records when the backup started. Every row it
+  holds was committed by then, so reports can state how old they are.
+
+In prefork mode every worker runs a refresher. A worker skips a scheduled
+refresh when another one has published a snapshot since its own last write.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+
+class AnalyticsSnapshot:
+    """Refreshes the snapshot file in the background and lends read-only connections to it."""
+
+    def __init__(
+        self,
+        source: Path | str,
+        path: Path | str,
+        refresh_seconds: float = 30.0,
+        refresh_changes: int = 500,
+        pool_size: int = 4,
+        factory: type[sqlite3.Connection] = sqlite3.Connection,
+    ) -> None:
+        self.source = Path(source)
+        self.path = Path(path)
+        self.refresh_seconds = max(0.1, refresh_seconds)
+        # 0 disables change-triggered refreshes; the timer still runs.
+        self.refresh_changes = max(0, refresh_changes)
+        self.pool_size = max(1, pool_size)
+        self.factory = factory
+        self.refreshes = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self._pending = 0
+        self._dirty_since: float | None = None
+        self._idle: queue.LifoQueue[tuple[int, str, sqlite3.Connection]] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        # A snapshot left by an earlier run may be hours old (or torn by a crash: it is written without fsync);
+        # reports use the live database until the first refresh instead. A fresh one is another worker's.
+        try:
+            if time.time() - self.path.stat().st_mtime > self.refresh_seconds:
+                self.path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+        self._thread = threading.Thread(target=self._run, name="hss-analytics-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.close()
+
+    def notify(self, changes: int = 1) -> None:
+        """Count committed writes; reaching ``refresh_changes`` refreshes without waiting for the timer."""
+        with self._lock:
+            self._pending += changes
+            if self._dirty_since is None:
+                self._dirty_since = time.time()
+            due = self.refresh_changes and self._pending >= self.refresh_changes
+        if due:
+            self._wake.set()
+
+    def _run(self) -> None:
+        self._refresh_logged()
+        while not self._stop.is_set():
+            triggered = self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            with self._lock:
+                pending, dirty_since = self._pending, self._dirty_since
+            if not pending:
+                continue
+            if not triggered and dirty_since is not None and self._published_at() >= dirty_since:
+                # Another worker published a snapshot after this worker's first unsnapshotted write.
+                with self._lock:
+                    self._pending -= pending
+                    self._dirty_since = None if not self._pending else self._dirty_since
+                continue
+            self._refresh_logged()
+
+    def _refresh_logged(self) -> None:
+        try:
+            self.refresh()
+        except Exception as exc:  # noqa: BLE001
+            self.failures += 1
+            print(f"[snapshot] refresh failed: {exc!r}")
+
+    def refresh(self) -> None:
+        """Back up the live database into a new snapshot file and publish it."""
+        with self._lock:
+            pending = self._pending
+        started = time.monotonic()
+        taken_at = datetime.now(timezone.utc).isoformat()
+        temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            source = sqlite3.connect(self.source, timeout=30)
+            target = sqlite3.connect(temporary)
+            try:
+                # The temporary file is discarded if anything fails, so it needs no fsyncs of its own.
+                target.execute("PRAGMA synchronous = OFF")
+                source.backup(target)
+                target.execute("PRAGMA journal_mode = DELETE")
+                target.execute("CREATE TABLE snapshot_meta (taken_at TEXT NOT NULL)")
+                target.execute("INSERT INTO snapshot_meta (taken_at) VALUES (?)", (taken_at,))
+                target.commit()
+            finally:
+                target.close()
+                source.close()
+            os.replace(temporary, self.path)
+        finally:
+            temporary.unlink(missing_ok=True)
+        with self._lock:
+            self._pending -= pending
+            if not self._pending:
+                self._dirty_since = None
+        self.refreshes += 1
+        self.last_duration = time.monotonic() - started
+        self._drop_stale()
+
+    def _published_at(self) -> float:
+        """When the current snapshot's backup started, as a Unix time; ``0.0`` if there is none."""
+        with self.connection() as snapshot:
+            return datetime.fromisoformat(snapshot[1]).timestamp() if snapshot else 0.0
+
+    def _open(self, inode: int) -> tuple[int, str, sqlite3.Connection]:
+        uri = f"{self.path.resolve().as_uri()}?mode=ro&immutable=1"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        taken_at = conn.execute("SELECT taken_at FROM snapshot_meta").fetchone()[0]
+        return inode, taken_at, conn
+
+    @contextmanager
+    def connection(self) -> Iterator[tuple[sqlite3.Connection, str] | None]:
+        """Yield ``(connection, taken_at)`` for the current snapshot, or ``None`` before the first one exists."""
+        try:
+            inode = self.path.stat().st_ino
+        except FileNotFoundError:
+            yield None
+            return
+        entry = None
+        while entry is None:
+            try:
+                candidate = self._idle.get_nowait()
+            except queue.Empty:
+                entry = self._open(inode)
+                break
+            if candidate[0] == inode:
+                entry = candidate
+            else:
+                candidate[2].close()
+        try:
+            yield entry[2], entry[1]
+        finally:
+            # Connections to a replaced snapshot are closed by ``_drop_stale`` or at their next checkout.
+            if self._idle.qsize() < self.pool_size:
+                self._idle.put(entry)
+            else:
+                entry[2].close()
+
+    def _drop_stale(self) -> None:
+        """Close idle connections to replaced snapshots so their files can be freed."""
+        current = self.path.stat().st_ino
+        keep = []
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if entry[0] == current:
+                keep.append(entry)
+            else:
+                entry[2].close()
+        for entry in keep:
+            self._idle.put(entry)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait()[2].close()
+            except queue.Empty:
+                return
+
+    def render_metrics(self) -> str:
+        """Prometheus text lines for refresh counters and snapshot age."""
+        published = self._published_at()
+        age = time.time() - published if published else -1
+        lines = []
+        for name, value in (("refreshes", self.refreshes), ("refresh_failures", self.failures)):
+            lines += [f"# TYPE hss_snapshot_{name}_total counter", f"hss_snapshot_{name}_total {value}"]
+        lines += [
+            "# TYPE hss_snapshot_age_seconds gauge",
+            f"hss_snapshot_age_seconds {age:.3f}",
+            "# TYPE hss_snapshot_last_refresh_seconds gauge",
+            f"hss_snapshot_last_refresh_seconds {self.last_duration:.6f}",
+            "# TYPE hss_snapshot_pending_changes gauge",
+            f"hss_snapshot_pending_changes {self._pending}",
+        ]
+        return "\n".join(lines) + "\n"
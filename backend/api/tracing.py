@@ -0,0 +1,250 @@
+"""Per-request tracing, SQL statement timing and on-demand profiling.
+
+A ``Trace`` is bound to the current thread (via ``contextvars``) while
+``ApiHandler.dispatch`` runs. Code marks phases with ``span(name)``, and
+``TracedConnection`` (the pool's connection factory) times every ``execute``
+and ``executemany``. Outside a request both are a single context-variable
+lookup, so tracing stays on in production.
+
+Requests slower than ``HSS_SLOW_REQUEST_MS`` are logged as one JSON line.
+cProfile captures are taken for a sampled fraction of requests
+(``HSS_PROFILE_SAMPLE_RATE``) or when an admin sends ``X-HSS-Profile: 1``.
+The last few captures are kept in memory for download.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+SLOW_REQUEST_MS = float(os.getenv("HSS_SLOW_REQUEST_MS", "500"))
+PROFILE_SAMPLE_RATE = float(os.getenv("HSS_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_KEEP = int(os.getenv("HSS_PROFILE_KEEP", "20"))
+MAX_SQL_RECORDS = 200
+
+_current: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("hss_trace", default=None)
+
+
+@dataclass
+class Trace:
+    request_id: str
+    method: str
+    route: str
+    started: float = field(default_factory=time.perf_counter)
+    phases: dict[str, list[float]] = field(default_factory=dict)  # name -> [count, seconds]
+    sql: list[tuple[str, float]] = field(default_factory=list)
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        entry = self.phases.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def add_sql(self, statement: str, seconds: float) -> None:
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        if len(self.sql) < MAX_SQL_RECORDS:
+            self.sql.append((statement, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value, readable in browser dev tools."""
+        parts = [f"app;dur={self.elapsed() * 1000:.1f}", f"db;dur={self.sql_seconds * 1000:.1f}"]
+        parts += [f"{name.replace('.', '-')};dur={seconds * 1000:.1f}" for name, (_, seconds) in self.phases.items()]
+        return ", ".join(parts)
+
+    def record(self, status: int) -> dict[str, Any]:
+        slowest = sorted(self.sql, key=lambda item: item[1], reverse=True)[:5]
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "route": self.route,
+            "status": int(status),
+            "duration_ms": round(self.elapsed() * 1000, 2),
+            "sql": {"count": self.sql_count, "total_ms": round(self.sql_seconds * 1000, 2)},
+            "phases": {
+                name: {"count": count, "total_ms": round(seconds * 1000, 2)}
+                for name, (count, seconds) in self.phases.items()
+            },
+            "slowest_sql": [
+                {"ms": round(seconds * 1000, 2), "statement": " ".join(statement.split())[:200]}
+                for statement, seconds in slowest
+            ],
+        }
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+@contextmanager
+def trace_request(request_id: str, method: str, route: str) -> Iterator[Trace]:
+    trace = Trace(request_id, method, route)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a phase of the current request; a no-op outside one."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_phase(name, time.perf_counter() - started)
+
+
+def log_if_slow(trace: Trace, status: int, threshold_ms: float = SLOW_REQUEST_MS) -> None:
+    if trace.elapsed() * 1000 >= threshold_ms:
+        print("[slow-request] " + json.dumps(trace.record(status)))
+
+
+class TracedConnection(sqlite3.Connection):
+    """``sqlite3.Connection`` that reports statement timings to the active trace."""
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:  # type: ignore[override]
+        trace = _current.get()
+        if trace is None:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            trace.add_sql(sql, time.perf_counter() - started)
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:  # type: ignore[override]
+        trace = _current.get()
+        if trace is None:
+            return super().executemany(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            trace.add_sql(sql, time.perf_counter() - started)
+
+    def commit(self) -> None:
+        trace = _current.get()
+        if trace is None or not self.in_transaction:
+            super().commit()
+            return
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            trace.add_sql("COMMIT", time.perf_counter() - started)
+
+
+class _LoadedStats:
+    """Profile-like holder so ``pstats.Stats`` can read stats kept in memory."""
+
+    def __init__(self, stats: dict[Any, Any]) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+@dataclass
+class ProfileCapture:
+    request_id: str
+    method: str
+    route: str
+    captured_at: str
+    duration_ms: float
+    stats: bytes  # marshal dump, the format written by ``cProfile.Profile.dump_stats``
+
+    def summary(self, limit: int = 40) -> str:
+        """Top functions by cumulative time, as printed by ``pstats``."""
+        out = io.StringIO()
+        pstats.Stats(_LoadedStats(marshal.loads(self.stats)), stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "route": self.route,
+            "captured_at": self.captured_at,
+            "duration_ms": self.duration_ms,
+        }
+
+
+class Profiler:
+    """Captures cProfile runs for selected requests and keeps the most recent ones."""
+
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE, keep: int = PROFILE_KEEP) -> None:
+        self.sample_rate = sample_rate
+        self.keep = max(1, keep)
+        self._captures: OrderedDict[str, ProfileCapture] = OrderedDict()
+        self._lock = threading.Lock()
+        # cProfile cannot run two captures at once in one process; extra requests go unprofiled.
+        self._active = threading.Lock()
+
+    def wanted(self, requested: bool) -> bool:
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def capture(self, trace: Trace) -> Iterator[bool]:
+        """Profile the enclosed block if no other capture is running; yields whether it is."""
+        if not self._active.acquire(blocking=False):
+            yield False
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                yield True
+            finally:
+                profile.disable()
+            profile.create_stats()
+            self._store(
+                ProfileCapture(
+                    trace.request_id,
+                    trace.method,
+                    trace.route,
+                    datetime.now(timezone.utc).isoformat(),
+                    round(trace.elapsed() * 1000, 2),
+                    marshal.dumps(profile.stats),  # type: ignore[attr-defined]
+                )
+            )
+        finally:
+            self._active.release()
+
+    def _store(self, capture: ProfileCapture) -> None:
+        with self._lock:
+            self._captures[capture.request_id] = capture
+            self._captures.move_to_end(capture.request_id)
+            while len(self._captures) > self.keep:
+                self._captures.popitem(last=False)
+
+    def list(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [capture.describe() for capture in reversed(self._captures.values())]
+
+    def get(self, request_id: str) -> ProfileCapture | None:
+        with self._lock:
+            return self._captures.get(request_id)
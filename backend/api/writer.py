@@ -0,0 +1,151 @@
+"""Single-writer queue with group commit.
+
+SQLite allows one writer at a time. When every request thread opens its own
+write transaction, the threads queue on the database lock (sleeping through
+``busy_timeout`` back-offs), and each one pays for its own commit. Instead,
+mutating handlers pass a job to ``WriteQueue.submit``. One writer thread
+drains the queue and runs up to ``max_batch`` jobs in a single
+``BEGIN IMMEDIATE`` transaction, each inside its own ``SAVEPOINT``:
+
+* a job that raises is rolled back to its savepoint, and the exception goes
+  back to that caller only;
+* the rest of the group commits together, and every caller is released
+  after that commit with the value its job returned.
+
+Jobs run in the submitting request's ``contextvars`` context, so their SQL
+still shows up in that request's trace.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, TypeVar
+
+from database import ConnectionPool
+
+T = TypeVar("T")
+Job = Callable[[sqlite3.Connection], T]
+_STOP = object()
+
+
+class WriteRejected(Exception):
+    """Raised by a job to refuse its write (missing row, invalid transition); nothing it did is kept."""
+
+    def __init__(self, status: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+class WriteQueue:
+    """Runs write jobs on one thread and commits them in groups."""
+
+    def __init__(self, pool: ConnectionPool, max_batch: int = 64, max_wait: float = 0.001) -> None:
+        self.pool = pool
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.jobs = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="hss-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Finish the jobs already queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, job: Job[T]) -> T:
+        """Run ``job(conn)`` in the next group commit and return its result once committed.
+
+        Exceptions raised by the job, or by the group's ``COMMIT``, are re-raised here.
+        """
+        self.start()
+        future: Future[T] = Future()
+        self._queue.put((job, contextvars.copy_context(), future))
+        return future.result()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch: list[tuple[Job[Any], contextvars.Context, Future[Any]]]) -> None:
+        outcomes: list[tuple[Future[Any], bool, Any]] = []
+        try:
+            with self.pool.connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for job, context, future in batch:
+                    conn.execute("SAVEPOINT write_job")
+                    try:
+                        result = context.run(job, conn)
+                    except Exception as exc:  # noqa: BLE001 - delivered to the submitting thread
+                        conn.execute("ROLLBACK TO write_job")
+                        conn.execute("RELEASE write_job")
+                        outcomes.append((future, False, exc))
+                    else:
+                        conn.execute("RELEASE write_job")
+                        outcomes.append((future, True, result))
+        except Exception as exc:  # noqa: BLE001
+            # BEGIN, a savepoint or COMMIT failed: nothing in this group was written.
+            print(f"[writer] group commit of {len(batch)} job(s) failed: {exc!r}")
+            self.batches += 1
+            self.failed += len(batch)
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        self.batches += 1
+        self.jobs += len(batch)
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                if isinstance(value, WriteRejected):
+                    self.rejected += 1
+                else:
+                    self.failed += 1
+                future.set_exception(value)
+
+    def render_metrics(self) -> str:
+        """Prometheus text lines for the writer counters."""
+        lines = []
+        for name, value in (
+            ("batches", self.batches),
+            ("jobs", self.jobs),
+            ("rejected", self.rejected),
+            ("failed", self.failed),
+        ):
+            lines += [f"# TYPE hss_write_{name}_total counter", f"hss_write_{name}_total {value}"]
+        lines += ["# TYPE hss_write_queue_depth gauge", f"hss_write_queue_depth {self._queue.qsize()}"]
+        return "\n".join(lines) + "\n"
@@ -33,27 +33,55 @@ const state = {
   apiBase: localStorage.getItem("hss-api-base") || "http://localhost:8081",
 };
 
+const MAX_CACHED_RESPONSES = 50;
+
 class ApiClient {
   constructor(getState) {
     this.getState = getState;
+    // GET responses by role and URL, revalidated with If-None-Match.
+    this.responses = new Map();
   }
 
   async request(path, options = {}) {
     const { apiBase, session } = this.getState();
-    const response = await fetch(`${apiBase}${path}`, {
+    const { headers = {}, ...init } = options;
+    const method = (init.method || "GET").toUpperCase();
+    const url = `${apiBase}${path}`;
+    const role = session.role || "customer";
+    const cacheKey = method === "GET" ? `${role} ${url}` : null;
+    const cached = cacheKey ? this.responses.get(cacheKey) : undefined;
+
+    const response = await fetch(url, {
+      ...init,
+      // Revalidation is handled here, so the browser cache stays out of the way.
+      cache: cacheKey ? "no-store" : init.cache,
       headers: {
         "Content-Type": "application/json",
-        "X-HSS-Role": session.role || "customer",
+        "X-HSS-Role": role,
         ...(session.token ? { Authorization: `Bearer ${session.token}` } : {}),
-        ...(options.headers || {}),
+        ...(cached ? { "If-None-Match": cached.etag } : {}),
+        ...headers,
       },
-      ...options,
     });
 
+    if (response.status === 304 && cached) {
+      return cached.data;
+    }
     const data = await response.json().catch(() => ({}));
     if (!response.ok) {
       const message = data?.error?.message || data.error || `API request failed (${response.status})`;
-      throw new Error(message);
+      const error = new Error(message);
+      error.status = response.status;
+      error.code = data?.error?.code;
+      throw error;
+    }
+    const etag = response.headers.get("ETag");
+    if (cacheKey && etag) {
+      this.responses.delete(cacheKey);
+      this.responses.set(cacheKey, { etag, data });
+      if (this.responses.size > MAX_CACHED_RESPONSES) {
+        this.responses.delete(this.responses.keys().next().value);
+      }
     }
     return data;
   }
@@ -424,6 +452,11 @@ function setupForms() {
       updateStepper();
       showMessage("form-status", "Booking submitted to backend and awaiting staff review.", "success");
     } catch (error) {
+      if (error.code === "slot_full") {
+        showMessage("form-status", "That pickup window has just filled up. Please choose another window or date.", "warning");
+        refreshPickupAvailability();
+        return;
+      }
       state.status = "submitted";
       approveOrder.disabled = false;
       proceedPayment.disabled = true;
@@ -493,12 +526,47 @@ function setupForms() {
   });
 }
 
+async function refreshPickupAvailability() {
+  const select = byId("pickup-window");
+  const pickupDate = readText("pickup-date");
+  if (!select || !pickupDate) {
+    return;
+  }
+
+  const options = [...select.options].filter((option) => option.value);
+  try {
+    const { slots } = await api.request(`/api/v1/pickup-slots?from=${pickupDate}&to=${pickupDate}`);
+    const available = new Map(slots.map((slot) => [slot.pickup_window, slot.available]));
+    options.forEach((option) => {
+      const left = available.get(option.value) ?? 0;
+      option.disabled = left === 0;
+      option.textContent = left === 0 ? `${option.value} (full)` : `${option.value} (${left} left)`;
+    });
+    if (select.selectedOptions[0]?.disabled) {
+      select.value = "";
+    }
+    const open = options.filter((option) => !option.disabled).length;
+    if (open) {
+      showMessage("pickup-availability", `${open} of ${options.length} windows open on ${pickupDate}.`);
+    } else {
+      showMessage("pickup-availability", `Every window on ${pickupDate} is full. Please pick another date.`, "warning");
+    }
+  } catch (error) {
+    options.forEach((option) => {
+      option.disabled = false;
+      option.textContent = option.value;
+    });
+    showMessage("pickup-availability", "Live availability is unavailable; staff will confirm your window.", "neutral");
+  }
+}
+
 function setupEstimateRefresh() {
   if (!byId("duration")) {
     return;
   }
 
   byId("duration").addEventListener("input", updateEstimate);
+  byId("pickup-date")?.addEventListener("change", refreshPickupAvailability);
   byId("estimate-btn").addEventListener("click", updateEstimate);
 
   byId("add-item").addEventListener("click", () => {